@@ -0,0 +1,52 @@
+#
+#*
+#**
+#*** This .py file measures how long "securopass gen" takes from a cold interpreter start.
+#*** It runs the command several times in fresh processes and fails if the median is over the budget.
+#*** It also fails if PySide6, keyring or cryptography were imported, gen must only load the logic layer.
+#*** Usage: python check_startup.py [runs]
+#**
+#*
+#
+
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+# --- CONSTANTS ---
+STARTUP_BUDGET_MS       = 150                                           # Median wall time for "securopass gen", interpreter start included
+DEFAULT_RUNS            = 10
+HEAVY_MODULES           = ("PySide6", "keyring", "cryptography")
+SECUROPASS              = os.path.join(os.path.dirname(os.path.abspath(__file__)), "securopass.py")
+
+def time_gen(runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SECUROPASS, "gen"], check=True, capture_output=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def heavy_imports():                                                    # -X importtime lists every module the command loaded
+    result = subprocess.run([sys.executable, "-X", "importtime", SECUROPASS, "gen"], check=True, capture_output=True, text=True)
+    return sorted({module for module in HEAVY_MODULES if f" {module}" in result.stderr})
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    runs = int(argv[0]) if argv else DEFAULT_RUNS
+    times = time_gen(runs)
+    median = statistics.median(times)
+    print(f"securopass gen: median {median:.1f} ms, min {min(times):.1f} ms over {runs} runs (budget {STARTUP_BUDGET_MS} ms)")
+    loaded = heavy_imports()
+    if loaded:
+        print(f"FAIL: gen imported {', '.join(loaded)}")
+        return 1
+    if median > STARTUP_BUDGET_MS:
+        print("FAIL: over budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
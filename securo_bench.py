@@ -0,0 +1,248 @@
+#
+#*
+#**
+#*** This .py file benchmarks SecuroPass: password generation, vault add, get and delete, cold unlock and filling the GUI vault list.
+#*** It runs headless, the keyring is replaced by an in-memory backend with a configurable latency per call,
+#*** and the GUI runs on Qt's offscreen platform. Synthetic vaults of each size are seeded in a temporary directory.
+#*** Results (throughput, p50 and p99 latency) are written as JSON and can be compared against a stored baseline.
+#*** Usage: python securo_bench.py [--sizes 10,1000,10000,100000] [--backend sqlite|json] [--output results.json] [--baseline baseline.json]
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from keyring.backend import KeyringBackend
+from keyring.errors import PasswordDeleteError
+
+import securo_logic
+
+import os
+import sys
+import json
+import time
+import shutil
+import keyring
+import argparse
+import platform
+import tempfile
+
+# --- CONSTANTS ---
+DEFAULT_SIZES           = (10, 1000, 10000, 100000)
+DEFAULT_LATENCY_MS      = 2.0                                           # Roughly one Secret Service D-Bus round trip
+GENERATE_SAMPLES        = 2000
+GENERATE_BATCH          = 100000                                        # Passwords per generate_many call for the throughput figure
+WRITE_SAMPLES           = 200                                           # Adds and deletes timed per vault size
+UNLOCK_SAMPLES          = 5
+GUI_SAMPLES             = 3
+BACKEND_SUFFIXES        = {"sqlite": ".db", "json": ".json"}            # Vault file extension that selects each storage backend
+REGRESSION_THRESHOLD    = 1.2                                           # p50 more than 20% slower than the baseline counts as a regression
+
+# --- Stand-in keyring ---
+
+class MemoryKeyring(KeyringBackend):                                    # Keeps secrets in a dict and sleeps on every call to model the OS keyring
+    priority = 1
+
+    def __init__(self, latency=0.0):
+        super(MemoryKeyring, self).__init__()
+        self.latency = latency
+        self.secrets = {}
+        self.calls = 0
+
+    def wait(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_password(self, service, username):
+        self.wait()
+        return self.secrets.get((service, username))
+
+    def set_password(self, service, username, password):
+        self.wait()
+        self.secrets[(service, username)] = password
+
+    def delete_password(self, service, username):
+        self.wait()
+        if (service, username) not in self.secrets:
+            raise PasswordDeleteError(username)
+        del self.secrets[(service, username)]
+
+# --- Measuring ---
+
+def percentile(sorted_samples, pct):                                    # Nearest rank
+    index = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+def summarise(samples, ops_per_sample=1):                               # samples are seconds per call, each call doing ops_per_sample operations
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        "samples":      len(ordered),
+        "ops_per_sec":  round(len(ordered) * ops_per_sample / total, 1) if total else None,
+        "p50_ms":       round(percentile(ordered, 50) * 1000, 4),
+        "p99_ms":       round(percentile(ordered, 99) * 1000, 4),
+        }
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+# --- Synthetic vaults ---
+
+def seed_vault(directory, size, suffix):                                # A vault of size entries under the master key, fully written out and closed
+    path = os.path.join(directory, f"sp-{size}{suffix}")
+    store = securo_logic.VaultStore(path)
+    store.unlock()
+    store.set_tokens((f"user{i}@site{i % 997}.com", store.keys.new_fernet(f"user{i}@site{i % 997}.com").encrypt(f"password-{i}".encode()).decode()) for i in range(size))
+    store.save()
+    store.close()
+    return path
+
+def copy_vault(path, directory, name):                                  # Fresh copy, so writes in one benchmark do not leak into the next
+    copy = os.path.join(directory, name)
+    shutil.copyfile(path, copy)
+    return copy
+
+# --- Benchmarks ---
+
+def bench_generate():
+    pref = securo_logic.Preferences()
+    securo_pass = securo_logic.SecuroPass(pref)
+    single = [timed(securo_pass.generate_password) for _ in range(GENERATE_SAMPLES)]
+    batch = [timed(securo_logic.generate_many, GENERATE_BATCH, pref.length) for _ in range(3)]
+    return {"generate_password": summarise(single), "generate_many": summarise(batch, GENERATE_BATCH)}
+
+def bench_writes(seeded, directory, size):
+    store = securo_logic.VaultStore(copy_vault(seeded, directory, "writes-" + os.path.basename(seeded)))
+    store.unlock()
+    adds = [timed(store.encrypt_to_json, f"bench-add-{i}", "password") for i in range(WRITE_SAMPLES)]
+    store.cache.clear()                                                 # Time the decrypt itself, not the secret cache
+    gets = [timed(store.decrypt, user) for user in store.users()[:WRITE_SAMPLES]]
+    deletes = [timed(store.delete_password, user) for user in store.users()[:WRITE_SAMPLES]]
+    store.close()
+    return {"add": summarise(adds), "get": summarise(gets), "delete": summarise(deletes)}
+
+def bench_unlock(seeded, backend):                                      # Read the vault, one keyring call, decrypt one entry
+    samples = []
+    calls = []
+    for _ in range(UNLOCK_SAMPLES):
+        before = backend.calls
+        start = time.perf_counter()
+        store = securo_logic.VaultStore(seeded)
+        if store.users():
+            store.decrypt(store.users()[0])
+        samples.append(time.perf_counter() - start)
+        store.close()
+        calls.append(backend.calls - before)
+    result = summarise(samples)
+    result["keyring_calls"] = max(calls)
+    return result
+
+def bench_gui(seeded, app):                                             # MainWindow built until its list holds every entry
+    import securo_gui
+    samples = []
+    for _ in range(GUI_SAMPLES):
+        start = time.perf_counter()
+        window = securo_gui.MainWindow(securo_logic.VaultStore(seeded, autoload=False))
+        while not window.add_password.isEnabled():                      # Re-enabled once the last batch is in the model
+            app.processEvents()
+            window.pool.waitForDone(1)
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+        rows = window.vault_model.rowCount()
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+    result = summarise(samples)
+    result["rows"] = rows
+    return result
+
+def run(sizes, latency, gui=True, storage="sqlite"):
+    backend = MemoryKeyring(latency)
+    keyring.set_keyring(backend)
+    results = {}
+    app = None
+    if gui:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication([])
+    results.update(bench_generate())
+    directory = tempfile.mkdtemp(prefix="securopass-bench-")
+    try:
+        for size in sizes:
+            seeded = seed_vault(directory, size, BACKEND_SUFFIXES[storage])
+            for name, result in bench_writes(seeded, directory, size).items():
+                results[f"{name}/{size}"] = result
+            results[f"cold_unlock/{size}"] = bench_unlock(seeded, backend)
+            if gui:
+                results[f"gui_populate/{size}"] = bench_gui(seeded, app)
+            print(f"  {size} entries done", file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "meta": {
+            "time":         time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python":       platform.python_version(),
+            "platform":     platform.platform(),
+            "keyring_latency_ms": latency * 1000,
+            "backend":      storage,
+            "sizes":        list(sizes),
+            },
+        "results": results,
+        }
+
+# --- Baseline comparison ---
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):          # Returns the names of metrics whose p50 regressed past threshold
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None or not old.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(f"{name:<28} p50 {old['p50_ms']:>10.3f} -> {result['p50_ms']:>10.3f} ms  x{ratio:5.2f}  {flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def print_report(report):
+    for name, result in report["results"].items():
+        print(f"{name:<28} {result['ops_per_sec'] or 0:>12.1f} ops/s  p50 {result['p50_ms']:>10.3f} ms  p99 {result['p99_ms']:>10.3f} ms")
+
+# --- Mainloop ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SecuroPass with an in-memory keyring.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated vault sizes (default %(default)s)")
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="simulated keyring latency per call (default %(default)s)")
+    parser.add_argument("--backend", choices=sorted(BACKEND_SUFFIXES), default="sqlite", help="vault storage backend (default %(default)s)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the GUI list population benchmark")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previous --output file, exit 1 on regressions")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.latency_ms / 1000, gui=not args.no_gui, storage=args.backend)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if compare(report, baseline):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
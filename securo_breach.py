@@ -0,0 +1,262 @@
+#
+#*
+#**
+#*** This .py file contains the offline breached-password check of SecuroPass, no network is ever used.
+#*** A Have I Been Pwned "Pwned Passwords" SHA-1 file (lines of HASH:COUNT) is converted once into pwned.idx:
+#*** sorted fixed-width records of (SHA-1, count) behind a 65536 entry fan-out table on the first two bytes of the hash.
+#*** The index is mmap-ed, so a corpus of tens of GB is never loaded into memory, and a lookup is a short binary search.
+#*** An optional Bloom filter (pwned.idx.bloom) answers most "not breached" lookups without touching the index at all.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from securo_logic import APP_DIR, VaultError
+from securo_trace import span
+
+import os
+import mmap
+import heapq
+import struct
+import hashlib
+import tempfile
+
+# --- CONSTANTS ---
+BREACH_INDEX_PATH       = os.environ.get("SECUROPASS_BREACH_INDEX", os.path.join(APP_DIR, 'pwned.idx'))   # Override with SECUROPASS_BREACH_INDEX
+INDEX_MAGIC             = b"SPPWNED1"
+BLOOM_MAGIC             = b"SPBLOOM1"
+HEADER                  = struct.Struct(">8sQ")                         # magic, record count
+FANOUT                  = struct.Struct(">65536Q")                      # Records whose hash starts with each 2 byte prefix, cumulative, like a git pack index
+RECORD                  = struct.Struct(">20sI")                        # SHA-1 digest, times seen in breaches (capped at 2**32 - 1)
+DIGEST_SIZE             = 20
+RECORDS_START           = HEADER.size + FANOUT.size
+BLOOM_HEADER            = struct.Struct(">8sQQ")                        # magic, bit count, hash count
+DEFAULT_BLOOM_BITS      = 10                                            # Bits per entry, about a 1% false positive rate with 7 hashes
+SORT_RUN_RECORDS        = 1 << 21                                       # Records sorted in memory per run while building, about 100 MB
+MERGE_FAN_IN            = 64                                            # Run files open at once while merging, well under the 256 files macOS allows a process by default
+BLOOM_KEYS              = struct.Struct(">QQ8x")                        # The two digest halves bloom_positions hashes with, read straight from a record
+MAX_COUNT               = 2 ** 32 - 1
+MAX_REDRAWS             = 100                                           # Draws per generated password before giving up, only very short passwords come close
+
+# --- Building the index ---
+
+def parse_corpus(path):                                                 # (digest, count) per line of a HASH:COUNT file, blank and malformed lines skipped
+    with open(path, 'rb') as f:
+        for line in f:
+            digest, _, count = line.strip().partition(b":")
+            if len(digest) != DIGEST_SIZE * 2:
+                continue
+            try:
+                yield bytes.fromhex(digest.decode('ascii')), min(int(count or 1), MAX_COUNT)
+            except ValueError:
+                continue
+
+def sorted_runs(records, directory):                                    # Sorts the corpus in memory-sized runs, each written to its own temp file
+    paths = []
+    run = []
+    for record in records:
+        run.append(RECORD.pack(*record))
+        if len(run) >= SORT_RUN_RECORDS:
+            paths.append(write_run(run, directory))
+            run = []
+    if run:
+        paths.append(write_run(run, directory))
+    return paths
+
+def write_run(run, directory) -> str:
+    run.sort()                                                          # Packed big-endian records sort by digest
+    fd, path = tempfile.mkstemp(prefix="pwned-run-", dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b"".join(run))
+    return path
+
+def read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            record = f.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return
+            yield record
+
+def merge_runs(runs, directory) -> None:                                # Merges the oldest MERGE_FAN_IN runs into one until a single pass can merge what is left
+    while len(runs) > MERGE_FAN_IN:
+        group = runs[:MERGE_FAN_IN]
+        fd, path = tempfile.mkstemp(prefix="pwned-run-", dir=directory)
+        runs.append(path)                                               # Listed before it is written, so a failed build still removes it
+        with os.fdopen(fd, 'wb') as f:
+            f.writelines(heapq.merge(*map(read_run, group)))
+        del runs[:MERGE_FAN_IN]
+        for run in group:
+            os.remove(run)
+
+def build_index(corpus_path, index_path=BREACH_INDEX_PATH, bloom_bits=DEFAULT_BLOOM_BITS, progress=None) -> int:
+    """Convert a HIBP SHA-1 file into the index at index_path, returns the record count.
+
+    The corpus does not have to be sorted or fit in memory: it is sorted in
+    runs on disk next to the index and merged, at most MERGE_FAN_IN runs at a
+    time, repeated hashes are combined.
+    With bloom_bits > 0 a Bloom filter of that many bits per entry is written
+    to index_path + ".bloom". progress(records) is called every million records.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    if os.path.exists(index_path + ".bloom"):                           # Would no longer match the new index
+        os.remove(index_path + ".bloom")
+    runs = sorted_runs(parse_corpus(corpus_path), directory)
+    fanout = [0] * 65536
+    count = 0
+    temp_path = index_path + ".tmp"
+    try:
+        merge_runs(runs, directory)
+        with open(temp_path, 'wb') as f:
+            f.write(b"\0" * RECORDS_START)                              # Header and fan-out are filled in once the records are counted
+            previous, seen = None, 0
+            for record in heapq.merge(*map(read_run, runs)):
+                digest, times = RECORD.unpack(record)
+                if digest == previous:                                  # Same hash listed twice, keep one record with the counts added up
+                    seen = min(seen + times, MAX_COUNT)
+                    continue
+                if previous is not None:
+                    f.write(RECORD.pack(previous, seen))
+                previous, seen = digest, times
+                fanout[digest[0] << 8 | digest[1]] += 1
+                count += 1
+                if progress is not None and count % 1000000 == 0:
+                    progress(count)
+            if previous is not None:
+                f.write(RECORD.pack(previous, seen))
+            total = 0
+            for prefix, bucket in enumerate(fanout):
+                total += bucket
+                fanout[prefix] = total
+            f.seek(0)
+            f.write(HEADER.pack(INDEX_MAGIC, count))
+            f.write(FANOUT.pack(*fanout))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, index_path)
+    finally:
+        for path in runs + [temp_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    if bloom_bits > 0:
+        build_bloom(index_path, bloom_bits)
+    return count
+
+def bloom_positions(h1, h2, bits, hashes):                              # Double hashing on the first two 8 byte halves of the digest, SHA-1 is already uniform
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+def build_bloom(index_path, bits_per_entry=DEFAULT_BLOOM_BITS) -> None:    # The table is set in place in a memory mapped file, so the page cache holds it, not the heap
+    temp_path = index_path + ".bloom.tmp"
+    with BreachIndex(index_path, bloom=False) as index, open(temp_path, 'w+b') as f:
+        bits = max(8, index.count * bits_per_entry)
+        hashes = max(1, round(bits_per_entry * 0.693))                  # k = m/n ln 2 minimises false positives
+        f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+        f.truncate(BLOOM_HEADER.size + (bits + 7) // 8)                 # A sparse file of zero bits, nothing is written up front
+        with mmap.mmap(f.fileno(), 0) as table:
+            with memoryview(table)[BLOOM_HEADER.size:] as bitmap, memoryview(index.map)[RECORDS_START:] as records:
+                for h1, h2 in BLOOM_KEYS.iter_unpack(records):          # Unpacked in C, no slice per record
+                    for position in bloom_positions(h1, h2, bits, hashes):
+                        bitmap[position >> 3] |= 1 << (position & 7)
+            table.flush()
+    os.replace(temp_path, index_path + ".bloom")
+
+# --- Lookups ---
+
+class BreachIndex():                                                    # Read-only view of pwned.idx, safe to share between threads
+    def __init__(self, path=BREACH_INDEX_PATH, bloom=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < RECORDS_START:
+            self.close()
+            raise VaultError(f"Sorry, {path} is not a breached password index.")
+        magic, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != INDEX_MAGIC or len(self.map) != RECORDS_START + self.count * RECORD.size:
+            self.close()
+            raise VaultError(f"Sorry, {path} is not a breached password index, or it is incomplete.")
+        self.fanout = FANOUT.unpack_from(self.map, HEADER.size)
+        self.bloom = None
+        if bloom and os.path.exists(path + ".bloom"):
+            with open(path + ".bloom", 'rb') as f:
+                self.bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.bloom_bits, self.bloom_hashes = BLOOM_HEADER.unpack_from(self.bloom, 0)
+            if magic != BLOOM_MAGIC:
+                self.bloom.close()
+                self.bloom = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.map.close()
+        if getattr(self, "bloom", None) is not None:
+            self.bloom.close()
+
+    def maybe_contains(self, digest) -> bool:                           # False means definitely not breached
+        if self.bloom is None:
+            return True
+        h1 = int.from_bytes(digest[:8], 'big')                          # Same positions as bloom_positions, computed lazily so most misses stop after one or two probes
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        for i in range(self.bloom_hashes):
+            position = (h1 + i * h2) % self.bloom_bits
+            if not self.bloom[BLOOM_HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def lookup(self, digest) -> int:                                    # Times the SHA-1 digest was seen in breaches, 0 if never
+        if not self.maybe_contains(digest):
+            return 0
+        prefix = digest[0] << 8 | digest[1]
+        lo = self.fanout[prefix - 1] if prefix else 0
+        hi = self.fanout[prefix]
+        while lo < hi:                                                  # Binary search inside the records sharing the 2 byte prefix
+            mid = (lo + hi) // 2
+            offset = RECORDS_START + mid * RECORD.size
+            found = self.map[offset:offset + DIGEST_SIZE]
+            if found < digest:
+                lo = mid + 1
+            elif found > digest:
+                hi = mid
+            else:
+                return RECORD.unpack_from(self.map, offset)[1]
+        return 0
+
+    def times_seen(self, password) -> int:                              # password is a str or the plaintext bytes
+        if isinstance(password, str):
+            password = password.encode()
+        return self.lookup(hashlib.sha1(password).digest())
+
+    def __contains__(self, password):
+        return self.times_seen(password) > 0
+
+def open_index(path=BREACH_INDEX_PATH):                                 # The index if it has been built, else None, the check is simply skipped
+    try:
+        return BreachIndex(path)
+    except (FileNotFoundError, ValueError, VaultError):                 # ValueError: mmap of an empty file
+        return None
+
+def audit_vault(store, index) -> dict:                                  # {username: times seen} for every saved password found in the index
+    with span("breach.audit"):
+        return {user: seen for user, seen in ((user, index.times_seen(plaintext)) for user, plaintext in store.iter_decrypted()) if seen}
+
+def without_breached(passwords, index, redraw, max_redraws=MAX_REDRAWS):     # Replaces any generated password found in index with redraw(), VaultError if that keeps failing
+    for password in passwords:
+        redraws = 0
+        while password in index:
+            if redraws == max_redraws:
+                raise VaultError("Sorry, every password drawn was in the breached password index, use a longer password or more character classes.")
+            password = redraw()
+            redraws += 1
+        yield password
@@ -0,0 +1,288 @@
+#
+#*
+#**
+#*** This .py file contains the command line interface of the SecuroPass application.
+#*** It only imports the logic (securo_logic.py), never PySide6, so it starts quickly and works without a display.
+#*** Run "python securopass.py --help" for the list of commands, add --json for output that scripts can parse.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from securo_logic import (
+    MAX_PASS_LEN,
+    PHRASE_MAX_LEN,
+    DEFAULT_PASS_LEN,
+    VAULT_PATH,
+    Charset,
+    Preferences,
+    SecuroPass,
+    VaultError,
+    VaultStore,
+    iter_passwords,
+    random_length,
+    )
+
+import securo_trace
+
+import os
+import sys
+import csv
+import json
+import getpass
+import argparse
+
+# --- Argument parsing ---
+
+def add_generator_args(parser):                                         # Shared by "gen" and "add --generate", mirrors the generator panel of the GUI
+    parser.add_argument("-l", "--length", type=int, default=DEFAULT_PASS_LEN, help=f"password length, 1 to {MAX_PASS_LEN} (default {DEFAULT_PASS_LEN})")
+    parser.add_argument("--no-uppercase", dest="uppercase", action="store_false", help="do not use upper case letters")
+    parser.add_argument("--no-symbols", dest="symbols", action="store_false", help="do not use symbols")
+    parser.add_argument("--no-numbers", dest="numbers", action="store_false", help="do not use numbers")
+    parser.add_argument("--phrase", default=None, help=f"include this phrase in the password, max {PHRASE_MAX_LEN} characters")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="securopass", description="Generate passwords and manage the SecuroVault without the GUI.")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--vault", default=VAULT_PATH, help="vault file, sp.db (SQLite) or a .json file (default: next to securopass.py, or $SECUROPASS_VAULT)")
+    parser.add_argument("--breach-index", default=None, help="breached password index built by \"breach build\" (default: pwned.idx next to securopass.py, or $SECUROPASS_BREACH_INDEX)")
+    parser.add_argument("--profile", metavar="TRACE", help=f"time keyring, file and crypto calls, write a Chrome trace to TRACE and print a summary (or set ${securo_trace.PROFILE_ENV})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("gen", help="generate passwords")
+    add_generator_args(gen)
+    gen.add_argument("-n", "--count", type=int, default=1, help="how many passwords to generate")
+    gen.add_argument("--require-each", action="store_true", help="include at least one character from every enabled class")
+
+    add = commands.add_parser("add", help="save a password in the vault")
+    add.add_argument("user", help="username, website or service the password is linked to")
+    source = add.add_mutually_exclusive_group()
+    source.add_argument("-p", "--password", help="the password, prompted for (or read from stdin) if omitted")
+    source.add_argument("-g", "--generate", action="store_true", help="generate the password, using the gen options")
+    add_generator_args(add)
+
+    get = commands.add_parser("get", help="print a saved password")
+    get.add_argument("user")
+
+    rm = commands.add_parser("rm", help="delete a saved password")
+    rm.add_argument("user")
+
+    commands.add_parser("ls", help="list saved usernames")
+
+    export = commands.add_parser("export", help="write every saved password, decrypted, as JSON")
+    export.add_argument("-o", "--output", help="file to write, created readable by you only (default: stdout)")
+    export.add_argument("-e", "--encrypt", action="store_true", help="protect the export with a passphrase (needs --output)")
+
+    import_ = commands.add_parser("import", help="import passwords from a CSV or JSON export")
+    import_.add_argument("file", help="CSV or JSON export from SecuroPass or another password manager")
+    import_.add_argument("--format", choices=("auto", "csv", "json"), default="auto", help="file format (default: from the file extension)")
+    import_.add_argument("-e", "--encrypted", action="store_true", help="the file is an encrypted SecuroPass export, prompt for its passphrase")
+    import_.add_argument("-w", "--workers", type=int, default=None, help="encryption processes (default: one per CPU)")
+
+    commands.add_parser("audit", help="report reused, near-duplicate, weak and breached passwords")
+
+    rotate = commands.add_parser("rotate", help="re-encrypt every saved password under a new master key, resumes if interrupted")
+    rotate.add_argument("-w", "--workers", type=int, default=None, help="encryption processes (default: one per CPU)")
+
+    breach = commands.add_parser("breach", help="check passwords against an offline copy of the Have I Been Pwned corpus")
+    actions = breach.add_subparsers(dest="action", required=True)
+    build = actions.add_parser("build", help="convert a Pwned Passwords SHA-1 file (HASH:COUNT lines) into the index, once")
+    build.add_argument("corpus", help="pwned-passwords-sha1 text file, sorted or not")
+    build.add_argument("--bloom-bits", type=int, default=10, help="Bloom filter bits per entry for fast negatives, 0 for none (default %(default)s)")
+    actions.add_parser("audit", help="list saved passwords that appear in the index")
+    return parser
+
+def preferences(args):
+    if not 1 <= args.length <= MAX_PASS_LEN:
+        raise VaultError(f"Password length must be between 1 and {MAX_PASS_LEN}.")
+    if args.phrase is not None and (len(args.phrase) > PHRASE_MAX_LEN or " " in args.phrase):
+        raise VaultError(f"The phrase must be at most {PHRASE_MAX_LEN} characters, spaces not allowed.")
+    pref = Preferences()
+    pref.uppercase = args.uppercase
+    pref.symbols = args.symbols
+    pref.numbers = args.numbers
+    pref.length = args.length
+    pref.phrase = args.phrase
+    return pref
+
+def read_password(user):
+    return read_secret(f"Password for {user}: ")
+
+def read_secret(prompt):
+    if sys.stdin.isatty():
+        return getpass.getpass(prompt)
+    return sys.stdin.readline().rstrip("\n")                            # Piped in by a script
+
+def load_breach_index(args, required=False):                            # gen and add redraw breached passwords when the index has been built
+    import securo_breach
+    path = args.breach_index or securo_breach.BREACH_INDEX_PATH
+    index = securo_breach.open_index(path) if required or os.path.exists(path) else None
+    if index is None and required:
+        raise VaultError(f"No breached password index at {path}, build one with: securopass breach build pwned-passwords-sha1.txt")
+    return index
+
+def print_progress(imported, skipped):
+    print(f"\rImported {imported}, skipped {skipped} duplicates...", end="", file=sys.stderr, flush=True)
+
+# --- Commands ---
+
+def cmd_gen(args, securo_pass):
+    if args.count < 1:
+        raise VaultError("Count must be at least 1.")
+    pref = securo_pass.pref
+    passwords = iter_passwords(args.count, pref.length, Charset.from_preferences(pref), pref.phrase, args.require_each)
+    index = load_breach_index(args)
+    if index is not None and random_length(pref.length, pref.phrase) > 0:   # A phrase filling the whole length cannot be redrawn
+        from securo_breach import without_breached
+        passwords = without_breached(passwords, index, lambda: next(iter_passwords(1, pref.length, Charset.from_preferences(pref), pref.phrase, args.require_each)))
+    if args.json:
+        return {"passwords": list(passwords)}, None
+    for password in passwords:                                          # Streamed, so huge batches never sit in memory
+        print(password)
+    return None, None
+
+def cmd_add(args, securo_pass):
+    if args.generate:
+        securo_pass.breach = load_breach_index(args)
+        password = securo_pass.generate_password()
+    elif args.password is not None:
+        password = args.password
+    else:
+        password = read_password(args.user)
+    password = password.replace(" ", "")                                # Same rule as the Add a password dialog
+    if not args.user or not password:
+        raise VaultError("Both a username and a password are needed.")
+    securo_pass.encrypt_to_json(args.user, password)
+    result = {"added": args.user}
+    if args.generate:
+        result["password"] = password
+        return result, password
+    return result, f"Saved password for {args.user}."
+
+def cmd_get(args, securo_pass):
+    password = securo_pass.decrypt_from_json(args.user)
+    return {"user": args.user, "password": password}, password
+
+def cmd_rm(args, securo_pass):
+    if args.user not in securo_pass.store:
+        raise VaultError("Sorry, password not found, ensure the password is saved in the correct file.")
+    securo_pass.delete_password(args.user)
+    return {"deleted": args.user}, f"Deleted password for {args.user}."
+
+def cmd_ls(args, securo_pass):
+    users = securo_pass.store.users()
+    return {"entries": users}, "\n".join(users)
+
+def cmd_export(args, securo_pass):
+    import securo_transfer                                              # Only loaded for import and export
+    if args.encrypt and args.output is None:
+        raise VaultError("An encrypted export needs a file, use --output.")
+    passphrase = None
+    if args.encrypt:
+        passphrase = read_secret("Export passphrase: ")
+        if not passphrase:
+            raise VaultError("The passphrase cannot be empty.")
+    entries = securo_transfer.export_entries(securo_pass.store)
+    if args.output is None:
+        return {"entries": entries}, json.dumps(entries, indent=2)
+    securo_transfer.write_export(args.output, entries, passphrase)
+    return {"exported": len(entries), "output": args.output, "encrypted": args.encrypt}, f"Exported {len(entries)} passwords to {args.output}."
+
+def cmd_import(args, securo_pass):
+    import securo_transfer
+    passphrase = read_secret("Export passphrase: ") if args.encrypted else None
+    progress = None if args.json or not sys.stderr.isatty() else print_progress
+    try:
+        imported, skipped = securo_transfer.import_file(securo_pass.store, args.file, args.format, passphrase, args.workers, progress)
+    except (OSError, csv.Error) as e:
+        raise VaultError(f"Sorry, {args.file} could not be read: {e}")
+    if progress is not None:
+        print(file=sys.stderr)
+    return {"imported": imported, "skipped": skipped}, f"Imported {imported} passwords, skipped {skipped} duplicates."
+
+def cmd_breach(args, securo_pass):
+    import securo_breach
+    if args.action == "build":
+        path = args.breach_index or securo_breach.BREACH_INDEX_PATH
+        progress = None if args.json or not sys.stderr.isatty() else lambda count: print(f"\rIndexed {count} hashes...", end="", file=sys.stderr, flush=True)
+        try:
+            count = securo_breach.build_index(args.corpus, path, args.bloom_bits, progress)
+        except OSError as e:
+            raise VaultError(f"Sorry, the index could not be built: {e}")
+        if progress is not None:
+            print(file=sys.stderr)
+        return {"records": count, "index": path}, f"Indexed {count} breached password hashes into {path}."
+    index = load_breach_index(args, required=True)
+    breached = securo_breach.audit_vault(securo_pass.store, index)
+    entries = [{"user": user, "times_seen": seen} for user, seen in sorted(breached.items())]
+    lines = [f"{entry['user']}: seen {entry['times_seen']} times in breaches" for entry in entries]
+    lines.append(f"{len(entries)} of {len(securo_pass.store)} saved passwords are breached.")
+    return {"checked": len(securo_pass.store), "breached": entries}, "\n".join(lines)
+
+def cmd_audit(args, securo_pass):
+    import securo_audit
+    report = securo_audit.audit_vault(securo_pass.store, load_breach_index(args))
+    return report, securo_audit.format_report(report)
+
+def cmd_rotate(args, securo_pass):
+    import securo_rotate
+    progress = None if args.json or not sys.stderr.isatty() else lambda rotated, total: print(f"\rRe-encrypted {rotated} of {total}...", end="", file=sys.stderr, flush=True)
+    result = securo_rotate.rotate_keys(securo_pass.store, args.workers, progress)
+    if progress is not None:
+        print(file=sys.stderr)
+    text = f"{'Resumed and finished' if result['resumed'] else 'Finished'} the key rotation, re-encrypted {result['rotated']} passwords under a new master key."
+    if result["skipped"]:
+        text += f" {result['skipped']} could not be decrypted and were left as they were."
+    return result, text
+
+COMMANDS = {
+    "gen":      cmd_gen,
+    "add":      cmd_add,
+    "get":      cmd_get,
+    "rm":       cmd_rm,
+    "ls":       cmd_ls,
+    "export":   cmd_export,
+    "import":   cmd_import,
+    "audit":    cmd_audit,
+    "breach":   cmd_breach,
+    "rotate":   cmd_rotate,
+    }
+
+# --- Mainloop ---
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        securo_trace.enable(args.profile)                                   # Written out, with its summary on stderr, when the process exits
+    try:
+        with securo_trace.span(f"cli.{args.command}"):
+            pref = preferences(args) if hasattr(args, "length") else Preferences()
+            needs_vault = args.command != "gen" and getattr(args, "action", None) != "build"   # gen and breach build never open the vault
+            store = VaultStore(args.vault) if needs_vault else None
+            try:
+                result, text = COMMANDS[args.command](args, SecuroPass(pref, store))
+            finally:
+                if store is not None:                                       # Writes buffered last-used times and waits for any compaction
+                    store.close()
+    except (VaultError, ValueError) as e:
+        if args.json:
+            print(json.dumps({"error": str(e)}), file=sys.stderr)
+        else:
+            print(e, file=sys.stderr)
+        return 1
+    if args.json and result is not None:
+        print(json.dumps(result))
+    elif not args.json and text:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,691 @@
+#
+#*
+#**
+#*** This .py file contains the GUI of the SecuroPass application, built with PySide6.
+#*** MainWindow holds most of the GUI, the logic it drives (SecuroPass and the SecuroVault) lives in securo_logic.py.
+#*** It is only imported when the GUI is launched, the command line interface never loads Qt.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from PySide6.QtWidgets import (
+    QApplication,
+    QMainWindow,
+    QGridLayout,
+    QMessageBox,
+    QListView,
+    QMenu,
+    QVBoxLayout,
+    QHBoxLayout,
+    QPushButton,
+    QLineEdit,
+    QCheckBox,
+    QWidget,
+    QSlider,
+    QDialog,
+    QLabel,
+    QStyle,
+    QPlainTextEdit,
+    )
+
+from PySide6.QtCore import Qt, QAbstractListModel, QEvent, QFileSystemWatcher, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6 import QtGui
+
+from securo_search import SearchIndex
+from securo_breach import audit_vault, open_index
+import securo_audit
+from securo_trace import span
+from securo_logic import (
+    APP_DIR,
+    MAX_PASS_LEN,
+    PHRASE_MAX_LEN,
+    DEFAULT_PASS_LEN,
+    DEFAULT_CHECKBOX_STATE,
+    Preferences,
+    SecuroPass,
+    VaultError,
+    VaultStore,
+    )
+
+import os
+import sys
+
+# --- CONSTANTS ---
+WINDOW_SIZE             = (490, 400)
+DIALOG_SIZE             = (260, 160)                                               
+SCROLLAREA_WIDTH        = 175
+PASSWORD_DIALOG_SIZE    = (260, 50) 
+AUDIT_DIALOG_SIZE       = (420, 360)
+ICON_PATH               = os.path.join(APP_DIR, "icon.ico")
+PASSWORD_MASK           = "•" * 10                                   # Shown in the vault list until an entry is revealed
+USER_ROLE               = Qt.UserRole                                     # Model role returning the bare username of a row
+LOAD_BATCH_SIZE         = 500                                            # Entries handed to the vault list per signal while loading
+SEARCH_LIMIT            = 1000                                           # Most search results shown at once, best matches first
+SECRET_SWEEP_MS         = 5000                                           # How often expired passwords are zeroed in the secret cache
+IDLE_FLUSH_MS           = 120000                                         # No key press or click for this long hides and zeroes every password
+RELOAD_DELAY_MS         = 300                                            # Quiet time after the vault files change before they are re-read, one reload per burst of writes
+
+# --- MainWindow, layout and all widgets ---
+class MainWindow(QMainWindow):
+    
+    def __init__(self, store=None):
+        super(MainWindow, self).__init__()
+        
+        self.pref = Preferences()                                            # Assign the pref to self.pref, otherwise it would be a local variable and not accessible outside of the __init__ function
+        self.store = store if store is not None else VaultStore(autoload=False)     # Parsed and unlocked on the thread pool, shared by the generator logic and the vault list
+        self.securo_pass = SecuroPass(self.pref, self.store)                 # Create an instance of the SecuroPass class and assign it to self.securo_pass
+        self.securo_pass.breach = open_index()                               # Offline breached password index, None until it has been built with the CLI
+        self.dialog = Dialog()                                               # Create an instance of the Dialog class and assign it to self.dialog
+
+        self.setWindowTitle("SecuroPass")
+        self.setWindowIcon(QtGui.QIcon(ICON_PATH))
+        self.setFixedSize(*WINDOW_SIZE)                                      # Hardcoded size of the window, * unpacks the tuple
+
+        self.pool = QThreadPool()                                            # Vault jobs run one at a time, in order, off the GUI thread
+        self.pool.setMaxThreadCount(1)
+        self.tasks = set()
+        self.loaded = False                                                  # True once the vault is read and unlocked, False while loading or locked
+
+        self.sweep_timer = QTimer(self)                                      # Zeroes cached passwords once their TTL has passed
+        self.sweep_timer.timeout.connect(self.store.cache.sweep)
+        self.sweep_timer.start(SECRET_SWEEP_MS)
+        self.idle_timer = QTimer(self)                                       # Restarted on every key press or click, see eventFilter
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.flush_secrets)
+        self.idle_timer.start(IDLE_FLUSH_MS)
+        QApplication.instance().installEventFilter(self)
+
+        self.watcher = QFileSystemWatcher(self)                              # Notices saves and deletes made by other SecuroPass windows or scripts
+        self.watcher.fileChanged.connect(self.vault_changed)
+        self.watcher.directoryChanged.connect(self.vault_changed)            # Files swapped in by an atomic rename, or created, only show up here
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.timeout.connect(self.refresh_vault)
+
+        with span("gui.build"):                                              # Widget creation, separate from the vault load that follows
+            self.setup_layouts()
+            self.setup_widgets()
+            self.setup_signals()
+        self.load_vault()
+
+    def setup_layouts(self):
+        self.top = QHBoxLayout()
+        self.left = QVBoxLayout()
+        self.bottom_left = QVBoxLayout()
+        self.right = QVBoxLayout()
+        self.bottom_right = QHBoxLayout()
+
+        self.top.setContentsMargins(10, 10, 10, 10)                               # Set the margins of the layout
+        self.left.setContentsMargins(10, 10, 10, 10)                         
+        self.bottom_left.setContentsMargins(10, 10, 10, 10)                   
+        self.right.setContentsMargins(10, 10, 10, 10)
+        self.bottom_right.setContentsMargins(10, 10, 10, 10)                     
+
+        self.grid = QGridLayout()
+        self.grid.addLayout(self.top,           0, 0, 1, 2)                                 # Where 1 is rowspan and 2 is columnspan 
+        self.grid.addLayout(self.left,          1, 0, 8, 1)                                      # Where 1 is row and 0 is column          
+        self.grid.addLayout(self.bottom_left,   9, 0, 2, 1)                               # Where 2 is row and 0 is column
+        self.grid.addLayout(self.right,         1, 1, 9, 1)                               # Where 2 is rowspan and 1 is columnspan
+        self.grid.addLayout(self.bottom_right,  10, 1, 1, 1)     
+
+        self.widget = QWidget()                                                   # Setting a central widget, acting as a container / parent for everything else (like a frame in tkinter)
+        self.widget.setLayout(self.grid)
+        self.setCentralWidget(self.widget)                                        # Set the central widget of the window, assigning the central widget as parent       
+
+    def setup_widgets(self):
+        # --- Top add widgets - the greeting text ---
+        self.top.addWidget(Text("Welcome to SecuroPass, free-and-open-source software to generate and manage your passwords.", align=Qt.AlignCenter, wrap=True))
+
+        # --- Left add widgets - the left panel of the gui ---
+        self.left.addWidget(Text("SecuroGen Password Generator:", align=Qt.AlignLeft, wrap=False))
+
+        self.checkbox_uppercase = Checkbox("Use upper case letters")          # Create an instance of the Checkbox class and assign it to self.checkbox_uppercase
+        self.left.addWidget(self.checkbox_uppercase)                          # Add the self.checkbox_uppercase to the left panel of the gui
+
+        self.checkbox_symbols = Checkbox("Use symbols $, #, / etc.")             
+        self.left.addWidget(self.checkbox_symbols)                            
+
+        self.checkbox_numbers = Checkbox("Use numbers")                       
+        self.left.addWidget(self.checkbox_numbers)                            
+
+        # --- Password length realtime value ---
+        self.slider_text = Text(f"Password Length:  {self.pref.length}", align=Qt.AlignLeft, wrap=False)        # Set the text of the slider and assign it to self.slider_text
+        self.left.addWidget(self.slider_text)                                   # Add the slider text to the left panel 
+
+        # --- Password length slider ---
+        self.slider = (Slider())                                                # Create an instance of the Slider class
+        self.left.addWidget(self.slider)                                        # Add the slider to the left panel  
+    
+        # --- User information about phrase in password --- 
+        self.left.addWidget(Text("Include this phrase in my password:", align=Qt.AlignLeft, wrap=False))
+        self.input_phrase = Input("Enter a phrase here...", readonly=False, max_len=PHRASE_MAX_LEN)                    
+        self.left.addWidget(self.input_phrase)
+        self.left.addWidget(Text("Max 32 characters, spaces not allowed.", align=Qt.AlignLeft, wrap=False))
+
+        # --- Bottomleft add widgets - the bottom left panel of the gui ---
+        self.gen_button = Button("Generate Password")                          
+        self.bottom_left.addWidget(self.gen_button)
+        self.password_label = Input("Password will appear here...", readonly=True, max_len=MAX_PASS_LEN)
+        self.bottom_left.addWidget(self.password_label)
+
+        # --- Right add widgets - the right panel of the gui ---
+        self.vault_title = Text("SecuroVault Saved Passwords:", align=Qt.AlignLeft, wrap=False)
+        self.right.addWidget(self.vault_title)
+
+        self.search_box = Input("Search SecuroVault...", readonly=False, max_len=PHRASE_MAX_LEN)
+        self.right.addWidget(self.search_box)
+
+        self.vault_model = VaultModel(self.securo_pass)
+        self.vault_list = VaultList(self.vault_model)
+        self.right.addWidget(self.vault_list)
+
+        # --- Bottomright add widgets - the bottom right panel of the gui ---
+        self.add_password = (Button("Add a password"))
+        self.bottom_right.addWidget(self.add_password)
+
+        self.delete_password = (Button("Delete"))
+        self.bottom_right.addWidget(self.delete_password)
+
+        self.audit_button = (Button("Health check"))
+        self.bottom_right.addWidget(self.audit_button)
+
+    
+    
+    
+
+    # --- Signals and slots ---
+    def setup_signals(self):
+        self.input_phrase.textChanged.connect(self.sanitize_input)
+
+        self.checkbox_uppercase.stateChanged.connect(self.update_uppercase)     # Connect the checkbox_uppercase to the update_uppercase function, acting as a signal
+        self.checkbox_symbols.stateChanged.connect(self.update_symbols)         
+        self.checkbox_numbers.stateChanged.connect(self.update_numbers)
+        self.slider.valueChanged.connect(self.update_length)                    # Connect the slider to the update_length function, acting as a signal
+        self.input_phrase.textChanged.connect(self.update_phrase)
+        self.gen_button.clicked.connect(self.generate_password)
+        self.add_password.clicked.connect(self.dialog.exec)                     # Executes dialog window class on press
+        self.dialog.save_password.clicked.connect(self.save_password)                   # Pass user and password to encrypt and store in json
+        self.dialog.save_password.clicked.connect(self.dialog.close)                    # Close the dialog window after saving the password
+        self.delete_password.clicked.connect(self.delete_selected)
+        self.audit_button.clicked.connect(self.audit_vault)
+        self.search_box.textChanged.connect(self.vault_model.set_query)         # Filters on every keystroke, served from the search index
+    
+    # --- Updates ---
+    def sanitize_input(self):
+        self.current_text = self.input_phrase.text()
+        self.sanitized_text = self.current_text.replace(" ", "")                # Replace spaces with nothing, not allow to store password with space
+        self.input_phrase.setText(self.sanitized_text)   
+
+    def update_uppercase(self):
+        self.pref.uppercase = self.checkbox_uppercase.isChecked()               # Update the uppercase preference to the state of the checkbox
+
+    def update_symbols(self):
+        self.pref.symbols = self.checkbox_symbols.isChecked()
+
+    def update_numbers(self):
+        self.pref.numbers = self.checkbox_numbers.isChecked()
+    
+    def update_length(self):
+        self.pref.length = self.slider.value()
+        self.slider_text.setText(f"Password Length:  {self.pref.length}")       # Update the text of the slider to reflect the user's choice
+
+    def update_phrase(self):
+        self.pref.phrase =  self.input_phrase.text()
+
+    def generate_password(self):
+        try:
+            password = self.securo_pass.generate_password()
+        except VaultError as e:                                                   # Every draw was breached, e.g. a length of 1
+            Error(str(e)).exec()
+            return
+        self.password_label.setText(password) 
+
+    # --- Vault jobs ---
+    def run_task(self, task, done, failed=None):
+        self.tasks.add(task)                                                    # Keeps the task and its signals alive until its result has been delivered
+        task.signals.finished.connect(done)
+        task.signals.failed.connect(failed if failed is not None else lambda text: Error(text).exec())
+        task.signals.finished.connect(lambda _: self.tasks.discard(task))
+        task.signals.failed.connect(lambda _: self.tasks.discard(task))
+        self.pool.start(task)
+        return task
+
+    def load_vault(self):
+        self.set_loading(True)
+        self.load_task = LoadVaultTask(self.store)
+        self.load_task.signals.batch.connect(self.vault_model.add_entries)     # The list fills in while the rest of the vault is still being read
+        self.run_task(self.load_task, self.vault_loaded, self.vault_locked)
+
+    def vault_loaded(self, _):
+        self.set_loading(False)
+        self.loaded = True
+        self.watch_vault()
+        if self.securo_pass.breach is not None:                                 # Flag breached entries once, new ones are checked as they are saved
+            self.run_task(Task(audit_vault, self.store, self.securo_pass.breach), self.vault_model.set_breached)
+
+    def vault_locked(self, text):                                               # Keyring locked or its prompt cancelled, try again or stay locked with saving disabled
+        self.vault_title.setText("SecuroVault Saved Passwords: (locked)")
+        if RetryError(text).exec() == QMessageBox.Retry:
+            self.load_vault()
+
+    def set_loading(self, loading):
+        if loading:
+            self.loaded = False
+        self.vault_title.setText("SecuroVault Saved Passwords: (unlocking...)" if loading else "SecuroVault Saved Passwords:")
+        self.add_password.setEnabled(not loading)                               # Saving before the vault is loaded would race the load
+        self.delete_password.setEnabled(not loading)
+        self.audit_button.setEnabled(not loading)
+
+    def watch_vault(self):                                                      # Watches are dropped when a file is replaced, so they are renewed after every reload
+        paths = [path for path in self.store.backend.watch_paths() if os.path.exists(path)]
+        paths.append(os.path.dirname(os.path.abspath(self.store.path)))
+        missing = [path for path in paths if path not in self.watcher.files() + self.watcher.directories()]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def vault_changed(self, _):
+        self.reload_timer.start(RELOAD_DELAY_MS)
+
+    def refresh_vault(self):                                                    # Queued behind any pending save or delete, only the entries that changed are updated
+        if not self.loaded:                                                     # Still loading, or locked, the next load reads the latest state anyway
+            return
+        self.run_task(Task(self.store.refresh), self.apply_changes)
+
+    def apply_changes(self, changed):
+        for user in changed:
+            if user in self.store:
+                self.vault_model.add_entry(user)
+            else:
+                self.vault_model.remove_entry(user)
+        self.watch_vault()
+
+    def save_password(self):
+        user = self.dialog.input_user.text()
+        password = self.dialog.input_pass.text()
+        seen = self.securo_pass.breach.times_seen(password) if self.securo_pass.breach is not None else 0
+        self.run_task(Task(self.securo_pass.encrypt_to_json, user, password), lambda _: self.vault_model.add_entry(user, seen))    # Update the vault list in place once it is saved
+
+    def delete_selected(self):
+        row = self.vault_list.selected_row()
+        if row is None:
+            return
+        user = self.vault_model.users[row]
+        self.run_task(Task(self.securo_pass.delete_password, user), lambda _: self.vault_model.remove_entry(user))
+
+    def audit_vault(self):
+        self.set_auditing(True)
+        task = self.run_task(Task(securo_audit.audit_vault, self.store, self.securo_pass.breach), self.show_audit)
+        task.signals.failed.connect(lambda _: self.set_auditing(False))
+
+    def set_auditing(self, auditing):
+        self.audit_button.setEnabled(not auditing)
+        self.audit_button.setText("Checking..." if auditing else "Health check")
+
+    def show_audit(self, report):
+        self.set_auditing(False)
+        if report["breached"] is not None:                                     # Fresher than the audit run at load time
+            self.vault_model.set_breached({entry["user"]: entry["times_seen"] for entry in report["breached"]})
+        AuditDialog(report).exec()
+
+    # --- Secret cache ---
+    def flush_secrets(self):
+        self.vault_model.hide_all()                                             # Hide first, otherwise repainting the rows would decrypt them again
+        self.store.cache.clear()
+
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.idle_timer.start(IDLE_FLUSH_MS)
+        return False
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange and self.isMinimized():
+            self.flush_secrets()
+        super(MainWindow, self).changeEvent(event)
+
+    def closeEvent(self, event):
+        self.load_task.cancel()                                                 # Stop loading, but let queued saves and deletes reach the disk
+        self.pool.waitForDone()
+        QApplication.instance().removeEventFilter(self)
+        self.reload_timer.stop()
+        self.store.lock_vault()
+        self.store.close()
+        super(MainWindow, self).closeEvent(event)
+
+
+
+
+
+# --- Other widgets ---
+
+class Error(QMessageBox):
+    def __init__(self, text):
+        super(Error, self).__init__()
+
+        self.setWindowTitle("Error")
+        self.setIcon(QMessageBox.Critical)                  
+        self.setText(text)
+
+class RetryError(Error):                                    # Error with Retry and Cancel, exec() returns the button pressed
+    def __init__(self, text):
+        super(RetryError, self).__init__(text)
+
+        self.setStandardButtons(QMessageBox.Retry | QMessageBox.Cancel)
+
+class Checkbox(QCheckBox):
+    def __init__(self, text):
+        super(Checkbox, self).__init__()
+
+        self.setText(text)                                  
+        self.setChecked(DEFAULT_CHECKBOX_STATE)                               
+
+class Slider(QSlider):
+    def __init__(self):
+        super(Slider, self).__init__()
+        
+        self.setMinimum(1)
+        self.setMaximum(MAX_PASS_LEN)                       
+        self.setSliderPosition(DEFAULT_PASS_LEN)            
+        self.setOrientation(Qt.Horizontal)                  
+
+class Text(QLabel):
+    def __init__(self, text, align, wrap):              
+        super(Text, self).__init__()
+        
+        self.setText(text)                             
+        self.setAlignment(align)  
+        self.setWordWrap(wrap)                          # Wrap the text if it exceeds the width of the label                          
+
+class Input(QLineEdit):                                         
+    def __init__(self, text, readonly, max_len):
+        super(Input, self).__init__()
+        
+        self.setPlaceholderText(text)                       
+        self.setReadOnly(readonly)                      # Password will be printed here so it is read only
+        self.setMaxLength(max_len)  
+             
+
+class Button(QPushButton):
+    def __init__(self, text):
+        super(Button, self).__init__()
+
+        self.setText(text)                                          # Set the text of the button (retrieve text from keyword argument)
+        
+class VaultModel(QAbstractListModel):                                       # One row per vault entry, passwords are only decrypted when revealed or copied
+    def __init__(self, securo_pass):
+        super(VaultModel, self).__init__()
+
+        self.securo_pass = securo_pass                                      # Same SecuroPass (and vault index) as the main window
+        self.entries = dict.fromkeys(self.securo_pass.store.users())        # Every entry in vault order, filled in by add_entries while loading
+        self.search = SearchIndex(self.entries)                             # Kept up to date on add and delete, never rebuilt
+        self.query = ""
+        self.users = list(self.entries)                                     # Rows currently shown, every entry or the search results
+        self.rows = {user: row for row, user in enumerate(self.users)}
+        self.revealed = set()                                               # Rows the user chose to reveal, their passwords come from the store's secret cache
+        self.breached = {}                                                  # username -> times its password was seen in breaches, from the offline index
+        self.warning = QApplication.style().standardIcon(QStyle.SP_MessageBoxWarning)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.users)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        user = self.users[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{user}\n{self.password(index.row()) if user in self.revealed else PASSWORD_MASK}"
+        if role == Qt.DecorationRole and user in self.breached:
+            return self.warning
+        if role == Qt.ToolTipRole:
+            if user in self.breached:
+                return f"This password has been seen {self.breached[user]} times in data breaches, change it\nDouble click to reveal, right click to copy"
+            return "Double click to reveal, right click to copy"
+        if role == USER_ROLE:
+            return user
+        return None
+
+    def password(self, row):                                                # Decrypts on demand, nothing is decrypted while the list is only being scrolled
+        value = self.securo_pass.store.decrypt(self.users[row])
+        return value if value is not None else "Error: Password not found."
+
+    def toggle_reveal(self, row) -> None:
+        user = self.users[row]
+        if user in self.revealed:
+            self.revealed.discard(user)
+        else:
+            self.revealed.add(user)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def hide_all(self) -> None:                                             # Mask every revealed row, e.g. before the secret cache is flushed
+        if not self.revealed:
+            return
+        self.revealed.clear()
+        if self.users:
+            self.dataChanged.emit(self.index(0), self.index(len(self.users) - 1), [Qt.DisplayRole])
+
+    def set_query(self, query) -> None:
+        self.query = query.strip()
+        self.refilter()
+
+    def refilter(self) -> None:                                             # Shows the search results for the current query, or every entry
+        with span("gui.filter"):
+            self.beginResetModel()
+            self.users = self.search.search(self.query, SEARCH_LIMIT) if self.query else list(self.entries)
+            self.rows = {user: row for row, user in enumerate(self.users)}
+            self.endResetModel()
+
+    def set_breached(self, breached) -> None:                               # Result of the whole-vault breach audit
+        self.breached = dict(breached)
+        if self.users:
+            self.dataChanged.emit(self.index(0), self.index(len(self.users) - 1), [Qt.DecorationRole, Qt.ToolTipRole])
+
+    def add_entry(self, user, breached=None) -> None:                       # Updates the one affected row instead of rebuilding the list
+        self.revealed.discard(user)
+        if breached:
+            self.breached[user] = breached
+        elif breached is not None:                                          # None: changed elsewhere, not checked yet, keep the flag it had
+            self.breached.pop(user, None)
+        if user in self.rows:
+            index = self.index(self.rows[user])
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.DecorationRole, Qt.ToolTipRole])
+            return
+        self.add_entries([user])
+
+    def add_entries(self, users) -> None:                                   # One insert per batch from the loader, not one per entry
+        users = [user for user in users if user not in self.entries]
+        if not users:
+            return
+        with span("gui.populate"):
+            self.entries.update(dict.fromkeys(users))
+            self.search.add_many(users)
+            if self.query:                                                  # New entries may rank anywhere in the results
+                self.refilter()
+                return
+            first = len(self.users)
+            self.beginInsertRows(QModelIndex(), first, first + len(users) - 1)
+            for row, user in enumerate(users, first):
+                self.users.append(user)
+                self.rows[user] = row
+            self.endInsertRows()
+
+    def remove_entry(self, user) -> None:
+        self.entries.pop(user, None)
+        self.breached.pop(user, None)
+        self.search.remove(user)
+        self.revealed.discard(user)
+        row = self.rows.get(user)
+        if row is None:                                                     # Filtered out of the current results
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.users[row]
+        self.rows = {user: row for row, user in enumerate(self.users)}
+        self.endRemoveRows()
+
+class VaultList(QListView):                                                 # Only the visible rows are painted, no widgets are created per entry
+    def __init__(self, model):
+        super(VaultList, self).__init__()
+
+        self.setModel(model)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)               # Set the vertical scrollbar policy to be always visible
+        self.setUniformItemSizes(True)                                      # Every row is two lines, lets the view skip measuring each one
+        self.setSelectionMode(QListView.SingleSelection)
+        self.setEditTriggers(QListView.NoEditTriggers)
+        self.setFixedWidth(SCROLLAREA_WIDTH + 40)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+
+        self.doubleClicked.connect(lambda index: model.toggle_reveal(index.row()))
+        self.customContextMenuRequested.connect(self.show_menu)
+        QtGui.QShortcut(QtGui.QKeySequence.Copy, self, activated=self.copy_selected)
+
+    def selected_row(self):
+        indexes = self.selectedIndexes()
+        return indexes[0].row() if indexes else None
+
+    def copy_selected(self) -> None:
+        row = self.selected_row()
+        if row is not None:
+            QApplication.clipboard().setText(self.model().password(row))
+
+    def show_menu(self, pos) -> None:
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        self.setCurrentIndex(index)
+        menu = QMenu(self)
+        menu.addAction("Reveal / Hide", lambda: self.model().toggle_reveal(index.row()))
+        menu.addAction("Copy password", self.copy_selected)
+        menu.exec(self.viewport().mapToGlobal(pos))
+
+class Dialog(QDialog):
+    def sanitize_input(self):
+        self.current_text = self.input_pass.text()
+        self.sanitized_text = self.current_text.replace(" ", "")                               # Replace spaces with nothing, not allow to store password with space
+        self.input_pass.setText(self.sanitized_text)
+    
+    def __init__(self):
+        super(Dialog, self).__init__()
+
+        self.setWindowTitle("Add a password")
+        self.setWindowIcon(QtGui.QIcon(ICON_PATH))
+        self.setFixedSize(*DIALOG_SIZE)
+
+        self.layout = QVBoxLayout()
+        self.layout.setSpacing(10)                                                    # Same as self._.setContentsMargins(10, 10, 10, 10)                              
+        self.setLayout(self.layout)
+
+        
+        self.layout.addWidget(Text("What's this password linked to?", align=Qt.AlignLeft, wrap=False))
+        self.input_user = Input("Username, website, service...", readonly=False, max_len=PHRASE_MAX_LEN)
+        self.layout.addWidget(self.input_user)
+
+        self.layout.addWidget(Text("Add a password to SecuroVault:", align=Qt.AlignLeft, wrap=False))
+        self.input_pass = Input("Enter a password here...", readonly=False, max_len=MAX_PASS_LEN)
+        self.input_pass.textChanged.connect(self.sanitize_input)
+        self.layout.addWidget(self.input_pass)
+
+        self.save_password = Button("Add Password")
+        self.layout.addWidget(self.save_password)
+
+
+
+
+
+class AuditDialog(QDialog):                                                 # Report panel for the vault health check, usernames only, never passwords
+    def __init__(self, report):
+        super(AuditDialog, self).__init__()
+
+        self.setWindowTitle("SecuroVault health check")
+        self.setWindowIcon(QtGui.QIcon(ICON_PATH))
+        self.resize(*AUDIT_DIALOG_SIZE)
+
+        self.layout = QVBoxLayout()
+        self.setLayout(self.layout)
+
+        self.layout.addWidget(Text("Passwords to change are listed by username below.", align=Qt.AlignLeft, wrap=True))
+        self.report = QPlainTextEdit(securo_audit.format_report(report))
+        self.report.setReadOnly(True)
+        self.layout.addWidget(self.report)
+
+        self.close_button = Button("Close")
+        self.close_button.clicked.connect(self.close)
+        self.layout.addWidget(self.close_button)
+
+
+
+
+
+# --- Background jobs ---
+
+class TaskSignals(QObject):                                                 # QRunnable is not a QObject, so its signals live here
+    batch = Signal(list)
+    finished = Signal(object)
+    failed = Signal(str)
+
+class Task(QRunnable):                                                      # Runs one vault call on the thread pool and reports the result back to the GUI thread
+    error = "Sorry, the vault could not be updated: {}"
+    def __init__(self, fn, *args):
+        super(Task, self).__init__()
+
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+        self.cancelled = False
+        self.setAutoDelete(False)                                           # Owned by MainWindow.tasks, not by the pool
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            result = self.work()
+        except Exception as e:
+            self.signals.failed.emit(self.error.format(e))
+            return
+        self.signals.finished.emit(result)
+
+    def work(self):
+        return self.fn(*self.args)
+
+class LoadVaultTask(Task):                                                  # Reads and unlocks the vault, then hands the entries to the list in batches
+    error = "Sorry, the vault could not be unlocked: {}"
+
+    def __init__(self, store):
+        super(LoadVaultTask, self).__init__(None)
+
+        self.store = store
+
+    def work(self):
+        self.store.load()
+        if self.cancelled:                                                  # Window closed while reading, do not wait for a keyring prompt
+            return None
+        self.store.unlock()                                                 # The keyring call (and any migration) happens here rather than on first reveal
+        users = self.store.users()
+        for start in range(0, len(users), LOAD_BATCH_SIZE):
+            if self.cancelled:                                              # Window closed while loading
+                return None
+            self.signals.batch.emit(users[start:start + LOAD_BATCH_SIZE])
+        return len(users)
+
+
+
+
+
+# --- Mainloop ---
+
+def main():
+    app = QApplication(sys.argv)                            # Create an application object, an instance of the QApplication class, QApplication manages the GUI application, sys.argv is needed as it is a Python list containing the command line args passed to the app, ensures proper functionality               
+    window = MainWindow()                                   # Create an instance of the MainWindow class (the main window of the application, as the class defines it at the top of the script)           
+    window.show()                                           # Makes the main window visible        
+    return app.exec()                                       # Start the pyside event loop, infinite loop which waits for user input
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,934 @@
+#
+#*
+#**
+#*** This .py file contains the logic of the SecuroPass application, the password generator and the SecuroVault storage.
+#*** It does not import PySide6, so the command line interface (securo_cli.py) can use it without loading Qt.
+#*** Using keyring acts as a bridge to your operating systems keyring, which is where the key is stored securely.
+#*** Keyring stores in the following - Windows: Credential Manager, MacOS: Keychain, Linux: Secret Service API.
+#*** Fernet module is used for encryption and decryption, it is a symmetric encryption algorithm.
+#*** Secrets module securely generates random strings of text which are cryptographically secure.
+#*** To find the keyring password on your OS, search for "SecuroPass" in your respective manager.
+#*** A single master key is kept in the keyring ("SecuroPass Master"), each entry's key is derived from it with HKDF.
+#*** Ciphertexts are stored in sp.db (SQLite), or in sp.json plus its journal when the vault path ends in .json.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from json import JSONDecodeError
+from securo_trace import span
+
+import os
+import sys
+import zlib
+import json
+import base64
+import enum
+import string
+import secrets
+import functools
+import hashlib
+import itertools
+import time
+import tempfile
+import threading
+import collections
+
+# keyring and cryptography are imported where they are used, so generating a password does not pay for loading them
+
+# --- Get EXE Dir ---
+if getattr(sys, 'frozen', False):                                       # Packaged exe, the vault lives next to the executable
+    APP_DIR = os.path.dirname(os.path.abspath(sys.executable))
+else:
+    APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- CONSTANTS ---
+MAX_PASS_LEN            = 48
+PHRASE_MAX_LEN          = 32                                                     
+DEFAULT_PASS_LEN        = 16
+DEFAULT_CHECKBOX_STATE  = True                                            
+VAULT_PATH              = os.environ.get("SECUROPASS_VAULT", os.path.join(APP_DIR, 'sp.db'))   # Override with SECUROPASS_VAULT, e.g. for scripts, a .json path keeps the sp.json format
+SQLITE_SUFFIXES         = ('.db', '.sqlite', '.sqlite3')                 # Vault paths stored with SqliteBackend
+SQLITE_BUSY_TIMEOUT     = 5                                              # Seconds to wait for another SecuroPass process holding the write lock
+KEYRING_SERVICE         = "SecuroPass"                                   # Per-entry keys, stored under the entry's username
+MASTER_KEY_SERVICE      = "SecuroPass Master"                            # Separate service so the master key can never clash with a username
+MASTER_KEY_USER         = "master"
+MASTER_KEY_BYTES        = 32
+ROTATION_KEY_USER       = "master-next"                                  # New master secret while a key rotation is in progress, see securo_rotate.py
+JOURNAL_COMPACT_THRESHOLD = 128                                          # Dead journal records before sp.json is rewritten as a snapshot
+SECRET_CACHE_SIZE       = 32                                             # Decrypted passwords kept for repeated reveal and copy
+SECRET_CACHE_TTL        = 60                                             # Seconds a decrypted password may stay cached
+GENERATE_CHUNK_SIZE     = 4096                                           # Passwords whose randomness is drawn in one go by iter_passwords
+
+# --- Preferences values ---
+class Preferences:                                                          # Class to store the user preferences, rather than using global variables, much better practice
+    def __init__(self):
+        self.uppercase  = DEFAULT_CHECKBOX_STATE
+        self.symbols    = DEFAULT_CHECKBOX_STATE
+        self.numbers    = DEFAULT_CHECKBOX_STATE
+        self.length     = DEFAULT_PASS_LEN
+        self.phrase     = None
+
+# --- Batched password generation ---
+
+class Charset(enum.IntFlag):                                                # Character classes on top of the lower case letters, which are always used
+    LOWERCASE   = 0
+    UPPERCASE   = 1
+    SYMBOLS     = 2
+    NUMBERS     = 4
+    ALL         = 7
+
+    @classmethod
+    def from_preferences(cls, pref):
+        flags = cls.LOWERCASE
+        if pref.uppercase is True:
+            flags |= cls.UPPERCASE
+        if pref.symbols is True:
+            flags |= cls.SYMBOLS
+        if pref.numbers is True:
+            flags |= cls.NUMBERS
+        return flags
+
+class Alphabet():                                                           # Built once per set of flags, maps random bytes straight to characters
+    def __init__(self, charset_flags):
+        self.classes = [string.ascii_lowercase]                             # Same order as generate_password always used for its bank
+        if charset_flags & Charset.UPPERCASE:
+            self.classes.insert(0, string.ascii_uppercase)
+        if charset_flags & Charset.SYMBOLS:
+            self.classes.append(string.punctuation)
+        if charset_flags & Charset.NUMBERS:
+            self.classes.append(string.digits)
+        self.chars = ''.join(self.classes)
+        self.limit = 256 - 256 % len(self.chars)                            # Bytes at or above this would favour the first characters, they are rejected
+        self.table = bytes(ord(self.chars[b % len(self.chars)]) if b < self.limit else 0 for b in range(256))
+        self.rejected = bytes(range(self.limit, 256))
+        self.class_sets = [frozenset(chars) for chars in self.classes]
+
+    def draw(self, count) -> str:                                           # count unbiased characters from one bulk read of the CSPRNG per round
+        out = b''
+        while len(out) < count:
+            needed = count - len(out)
+            raw = secrets.token_bytes(needed * 256 // self.limit + 16)      # Expected rejections plus a little slack, usually one round
+            out += raw.translate(self.table, self.rejected)[:needed]        # Rejection sampling and mapping in a single C-level pass
+        return out.decode('ascii')
+
+    def has_every_class(self, password) -> bool:
+        chars = set(password)
+        return all(not chars.isdisjoint(class_set) for class_set in self.class_sets)
+
+@functools.lru_cache(maxsize=None)
+def get_alphabet(charset_flags) -> Alphabet:
+    return Alphabet(Charset(charset_flags))
+
+def random_length(length, phrase) -> int:                                  # Characters the phrase (and its underscore) leaves for random ones
+    return max(length - (len(phrase) + 1 if phrase else 0), 0)
+
+def iter_passwords(n, length=DEFAULT_PASS_LEN, charset_flags=Charset.ALL, phrase=None, require_each=False, chunk_size=GENERATE_CHUNK_SIZE):
+    """Yield n passwords, drawing randomness chunk_size passwords at a time so memory stays flat for any n.
+
+    Passwords follow the same rules as SecuroPass.generate_password: a phrase is
+    put in front with an underscore and the result is cut to length. With
+    require_each, passwords missing an enabled character class are redrawn, so
+    every class appears at least once without biasing the rest.
+    """
+    if length < 1:
+        raise ValueError("Password length must be at least 1.")
+    alphabet = get_alphabet(int(charset_flags))
+    prefix = (phrase + '_' if phrase else '')[:length]
+    random_len = random_length(length, phrase)
+    if require_each:
+        missing = sum(1 for class_set in alphabet.class_sets if class_set.isdisjoint(prefix))
+        if missing > random_len:
+            raise ValueError("Password is too short to include a character from every enabled class.")
+    if random_len == 0:                                                     # The phrase fills the whole length, nothing random to draw
+        for _ in range(n):
+            yield prefix
+        return
+    remaining = n
+    while remaining > 0:
+        batch = min(remaining, chunk_size)
+        drawn = alphabet.draw(batch * random_len)
+        for start in range(0, len(drawn), random_len):
+            password = prefix + drawn[start:start + random_len]
+            if require_each and not alphabet.has_every_class(password):
+                continue                                                    # Rejected, the shortfall is drawn again in the next round
+            yield password
+            remaining -= 1
+
+def generate_many(n, length=DEFAULT_PASS_LEN, charset_flags=Charset.ALL, phrase=None, require_each=False) -> list:
+    return list(iter_passwords(n, length, charset_flags, phrase, require_each))
+
+# --- SecuroPass logic ---
+
+class VaultError(Exception):                                                # Raised by the logic layer, the GUI and CLI decide how to show it
+    pass
+
+class SecuroPass():
+    def __init__(self, pref, store=None):
+        self.pref = pref
+        self._store = store                                                 # Share one loaded vault between every user of the logic, rather than re-reading it
+        self.breach = None                                                  # Optional securo_breach.BreachIndex, generated passwords found in it are redrawn
+
+    @property
+    def store(self):                                                        # Only opened on first use, generating a password never touches the vault
+        if self._store is None:
+            self._store = VaultStore()
+        return self._store
+    
+    def generate_password(self):                                            # Raises VaultError if every password drawn is breached, e.g. at length 1
+        draw = lambda: generate_many(1, self.pref.length, Charset.from_preferences(self.pref), self.pref.phrase)[0]     # Cached alphabet and one bulk read of the CSPRNG instead of one call per character
+        self.password = draw()
+        if self.breach is not None and random_length(self.pref.length, self.pref.phrase) > 0:    # A phrase filling the whole length gives the same password on every draw
+            from securo_breach import without_breached
+            self.password = next(without_breached([self.password], self.breach, draw))
+        return self.password
+
+    def encrypt_to_json(self, user, password: str) -> None:
+        self.store.encrypt_to_json(user, password)
+
+    def decrypt_from_json(self, user) -> str:
+        if self.store.get(user) is None:
+            raise VaultError("Sorry, password not found, ensure the password is saved in the correct file.")
+        password = self.store.decrypt(user)
+        if password is None:
+            raise VaultError("Sorry, could not be decrypted, ensure the key is saved in the keyring as needed.")
+        return password
+
+    def delete_password(self, user):
+        self.store.delete_password(user)
+
+def wipe(buffer) -> None:                                                   # Overwrite a bytearray in place, so the plaintext does not linger in freed memory
+    buffer[:] = bytes(len(buffer))
+
+class SecretCache():                                                        # Recently decrypted passwords, bounded by entry count and age, kept in bytearrays that are zeroed on eviction
+    def __init__(self, max_entries=SECRET_CACHE_SIZE, ttl=SECRET_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()                            # username -> (bytearray, expiry time), least recently used first
+        self.mutex = threading.Lock()                                       # Saves and deletes evict from the thread pool
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, user):                                                    # The cached password as a fresh str, or None on a miss
+        with self.mutex:
+            item = self.entries.get(user)
+            if item is not None and item[1] <= self.clock():
+                self.drop(user)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user)
+            self.hits += 1
+            return item[0].decode()
+
+    def put(self, user, plaintext: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self.mutex:
+            if user in self.entries:
+                self.drop(user)
+            self.entries[user] = (bytearray(plaintext), self.clock() + self.ttl)
+            while len(self.entries) > self.max_entries:
+                self.drop(next(iter(self.entries)))
+
+    def drop(self, user) -> None:                                           # Caller holds the mutex
+        buffer, _ = self.entries.pop(user)
+        wipe(buffer)
+        self.evictions += 1
+
+    def evict(self, user) -> None:
+        with self.mutex:
+            if user in self.entries:
+                self.drop(user)
+
+    def sweep(self) -> None:                                                # Evict everything past its TTL, called on a timer by the GUI
+        now = self.clock()
+        with self.mutex:
+            for user in [user for user, (_, expires) in self.entries.items() if expires <= now]:
+                self.drop(user)
+
+    def clear(self) -> None:
+        with self.mutex:
+            for user in list(self.entries):
+                self.drop(user)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self.entries)}
+
+class EntryKeys():                                                          # Original layout, one random Fernet key per entry stored in the keyring under the username
+    def unlock(self) -> bool:
+        return False
+
+    def lock(self) -> None:
+        pass
+
+    def fernet(self, user):
+        import keyring
+        from cryptography.fernet import Fernet
+        with span("keyring.get"):
+            key = keyring.get_password(KEYRING_SERVICE, user)
+        if key is None:
+            return None
+        return Fernet(key.encode())
+
+    def new_fernet(self, user):
+        import keyring
+        from cryptography.fernet import Fernet
+        key = Fernet.generate_key()
+        with span("keyring.set"):
+            keyring.set_password(KEYRING_SERVICE, user, key.decode())
+        return Fernet(key)
+
+    def forget(self, user) -> None:
+        import keyring
+        import keyring.errors
+        try:
+            with span("keyring.delete"):
+                keyring.delete_password(KEYRING_SERVICE, user)
+        except keyring.errors.PasswordDeleteError:                          # Key already gone, still remove the orphaned ciphertext
+            pass
+
+def derive_entry_key(secret, user) -> bytes:                               # Fernet key for one entry, a plain function so worker processes can derive keys too
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    with span("crypto.derive"):
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"SecuroPass entry:" + user.encode())     # The username binds each derived key to its own entry
+        return base64.urlsafe_b64encode(hkdf.derive(secret))
+
+class MasterKey():                                                          # One keyring secret for the whole vault, per-entry Fernet keys are derived from it locally with HKDF
+    def __init__(self):
+        self.secret = None
+        self.previous = None                                                # Old master secret while a key rotation is in progress, still accepted for decryption
+        self.rotating = False                                               # Set by VaultStore.check_rotation, the pending secret is only looked up then
+
+    def unlock(self) -> bool:                                               # The only keyring call, returns True if a new master secret had to be created
+        if self.secret is not None:
+            return False
+        import keyring
+        with span("keyring.get"):
+            secret = keyring.get_password(MASTER_KEY_SERVICE, MASTER_KEY_USER)
+        if secret is not None and self.rotating:
+            with span("keyring.get"):
+                pending = keyring.get_password(MASTER_KEY_SERVICE, ROTATION_KEY_USER)
+            if pending is not None:                                         # New entries go under the new secret, old ones still decrypt
+                self.previous = base64.urlsafe_b64decode(secret)
+                secret = pending
+        if secret is not None:
+            self.secret = base64.urlsafe_b64decode(secret)
+            return False
+        self.secret = secrets.token_bytes(MASTER_KEY_BYTES)
+        with span("keyring.set"):
+            keyring.set_password(MASTER_KEY_SERVICE, MASTER_KEY_USER, base64.urlsafe_b64encode(self.secret).decode())
+        return True
+
+    def lock(self) -> None:                                                 # Forget the master secret, the next decrypt asks the keyring again
+        self.secret = None
+        self.previous = None
+
+    def derive(self, user) -> bytes:
+        return derive_entry_key(self.secret, user)
+
+    def fernet(self, user):
+        from cryptography.fernet import Fernet, MultiFernet
+        self.unlock()
+        if self.previous is None:
+            return Fernet(self.derive(user))
+        return MultiFernet([Fernet(self.derive(user)), Fernet(derive_entry_key(self.previous, user))])    # Encrypts under the new secret, decrypts under either
+
+    def new_fernet(self, user):
+        return self.fernet(user)
+
+    def forget(self, user) -> None:                                         # Derived keys are never stored, nothing to remove
+        pass
+
+class Journal():                                                            # Append-only log of vault changes next to the sp.json snapshot, one checksummed record per line
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def encode(record) -> bytes:
+        payload = json.dumps(record, separators=(',', ':'))                 # ensure_ascii keeps every record on a single ASCII line
+        return f"{zlib.crc32(payload.encode()):08x} {payload}\n".encode()
+
+    def read(self, start=0):                                                # (intact records from offset start on, offset just past the last one), stops at the first torn or corrupt record
+        try:
+            with span("journal.read"), open(self.path, 'rb') as f:
+                f.seek(start)
+                raw = f.read()
+        except FileNotFoundError:
+            return [], 0
+        records = []
+        good = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n") or len(line) < 10:
+                break
+            checksum, _, payload = line[:-1].partition(b" ")
+            try:
+                if int(checksum, 16) != zlib.crc32(payload):
+                    break
+                record = json.loads(payload)
+            except ValueError:
+                break
+            good += len(line)
+            records.append(record)
+        if good < len(raw):                                                 # Cut off the damaged tail so new records are not appended after garbage, safe as writers hold the file lock
+            with open(self.path, 'r+b') as f:
+                f.truncate(start + good)
+        return records, start + good
+
+    def append(self, *records) -> None:                                     # Several records still go out in one write and one fsync
+        with span("journal.append"), open(self.path, 'ab') as f:
+            f.write(b''.join(self.encode(record) for record in records))
+            f.flush()
+            os.fsync(f.fileno())                                            # The record is durable before the change is reported as saved
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def drop_before(self, offset) -> None:                                  # Keeps only the records written after offset, used once they are folded into a snapshot
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return
+        if not tail:
+            os.remove(self.path)
+            return
+        write_atomic(self.path, tail)
+
+def write_atomic(path, content: bytes) -> None:                             # Write to a temp file in the same directory, then swap it in with an atomic rename
+    with span("file.write"):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+def file_signature(path):                                                   # (mtime, size) of path, None if it does not exist, a cheap "has anything changed" check
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class FileLock():                                                           # Advisory lock on a side file, shared by every SecuroPass process using the same vault
+    def __init__(self, path):
+        self.path = path
+        self.mutex = threading.RLock()                                      # The OS lock belongs to the process, this one orders the threads inside it
+        self.file = None
+        self.depth = 0
+
+    def __enter__(self):
+        self.mutex.acquire()
+        if self.depth == 0:
+            try:
+                if self.file is None:
+                    self.file = open(self.path, 'a+b')
+                lock_file(self.file)
+            except BaseException:
+                self.mutex.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            unlock_file(self.file)
+        self.mutex.release()
+        return False
+
+    def close(self) -> None:
+        with self.mutex:
+            if self.file is not None and self.depth == 0:
+                self.file.close()
+                self.file = None
+
+def lock_file(f) -> None:                                                   # Blocks until this process holds the lock
+    if os.name == 'nt':
+        import msvcrt
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)               # LK_LOCK gives up after 10 seconds, keep waiting
+                return
+            except OSError:
+                continue
+    import fcntl
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def unlock_file(f) -> None:
+    if os.name == 'nt':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+    import fcntl
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def still_current(data, record) -> bool:                                    # A record with 'expect' only applies while the entry still holds that token
+    return 'expect' not in record or data.get(record['user']) == record['expect']
+
+class JsonBackend():                                                        # sp.json snapshot plus the sp.log journal, every change is one appended record
+    def __init__(self, path):
+        self.path = path
+        self.journal = Journal(os.path.splitext(path)[0] + '.log')          # sp.json is the snapshot, sp.log holds every change made since
+        self.file_lock = FileLock(os.path.splitext(path)[0] + '.lock')      # Held by whichever process is reading or changing the files
+        self.lock = threading.RLock()                                       # Guards data and the journal against the background compaction thread
+        self.compactor = None
+        self.dead = 0                                                       # Records in the journal (or snapshot) that have since been overwritten or deleted
+        self.data = {}                                                      # username -> Fernet ciphertext, snapshot with the journal replayed on top
+        self.offset = 0                                                     # Journal bytes already applied to data, records past it were written by another process
+        self.snapshot = (None, None)                                        # (file_signature, content hash) of the sp.json that data was built from
+
+    def load(self, compact=True) -> None:                                   # compact=False for callers already holding file_lock, the compaction thread would wait on it forever
+        with span("vault.load"), self.file_lock, self.lock:
+            self.snapshot = (None, None)                                    # Forget the old snapshot, so it is parsed again
+            self.read_snapshot(file_signature(self.path))
+            self.offset = 0
+            self.catch_up()
+        if compact and self.dead >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact_in_background()
+
+    def read_snapshot(self, signature) -> bool:                             # Returns False if sp.json was touched but its content is the same as before
+        try:
+            with span("vault.read"), open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b''
+        content_hash = hashlib.blake2b(raw, digest_size=16).digest()
+        if content_hash == self.snapshot[1]:
+            self.snapshot = (signature, content_hash)
+            return False
+        try:
+            data = json.loads(raw) if raw.strip() else {}
+        except (JSONDecodeError, UnicodeDecodeError):                       # A damaged sp.json is an empty vault
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        self.data = {user: token for user, token in data.items() if isinstance(token, str)}    # Drop anything that is not a username -> ciphertext pair
+        self.dead = 0
+        self.snapshot = (signature, content_hash)
+        return True
+
+    def catch_up(self) -> set:                                              # Applies whatever other processes wrote since the last call, returns the usernames that changed, caller holds both locks
+        changed = set()
+        signature = file_signature(self.path)
+        if signature != self.snapshot[0]:                                   # Compacted by another process, which also restarted the journal
+            before = self.data
+            if self.read_snapshot(signature):
+                changed.update(user for user in before.keys() | self.data.keys() if before.get(user) != self.data.get(user))
+            self.offset = 0                                                 # Replaying records already applied is harmless, a set or delete twice is the same
+        if self.journal.size() < self.offset:
+            self.offset = 0
+        with span("journal.replay"):
+            records, self.offset = self.journal.read(self.offset)
+            for record in records:
+                user = record.get('user')
+                before = self.data.get(user)
+                self.apply(record)
+                if self.data.get(user) != before:
+                    changed.add(user)
+        return changed
+
+    def refresh(self) -> set:                                               # Changes made by other processes, applied in memory, as the set of usernames they touched
+        with self.file_lock, self.lock:
+            return self.catch_up()
+
+    def apply(self, record) -> None:
+        user = record.get('user')
+        if not isinstance(user, str):
+            return
+        if user in self.data:
+            self.dead += 1                                                  # The previous value of this entry is now dead
+        if record.get('op') == 'set' and isinstance(record.get('token'), str):
+            self.data[user] = record['token']
+        elif record.get('op') == 'del':
+            self.data.pop(user, None)
+            self.dead += 1                                                  # A delete record is dead as soon as it is applied
+
+    def write(self, records) -> list:                                       # Append changes to the journal in one write and apply them in memory, returns the records written
+        with self.file_lock, self.lock:
+            self.catch_up()                                                 # Never append on top of a stale view of the vault
+            records = [{key: value for key, value in record.items() if key != 'expect'} for record in records if still_current(self.data, record)]     # Compared under the file lock, no other process can write in between
+            if records:
+                self.journal.append(*records)
+                self.offset = self.journal.size()
+            for record in records:
+                self.apply(record)
+        if self.dead >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact_in_background()
+        return records
+
+    def touch(self, user) -> None:                                          # Last-used times are not kept in sp.json
+        pass
+
+    def metadata(self, user):
+        return None
+
+    def watch_paths(self) -> list:                                          # Files another process changes when it writes to this vault
+        return [self.path, self.journal.path]
+
+    def flush(self) -> None:                                                # Write a full snapshot now, used after changes that touch every entry
+        if self.compactor is not None:
+            self.compactor.join()
+        self.compact()
+
+    def close(self) -> None:
+        if self.compactor is not None:
+            self.compactor.join()
+        self.file_lock.close()
+
+    def compact(self) -> None:                                              # Fold the journal into a fresh sp.json snapshot
+        with self.file_lock:                                                # Other processes wait, so no record can be appended between the snapshot and dropping the journal
+            with self.lock:
+                self.catch_up()
+                with span("vault.serialise"):
+                    snapshot = json.dumps(self.data).encode()
+                offset = self.journal.size()
+                self.dead = 0
+            write_atomic(self.path, snapshot)                               # Slow part runs without the lock, lookups in this process carry on
+            with self.lock:
+                self.journal.drop_before(offset)
+                self.offset = self.journal.size()
+                self.snapshot = (file_signature(self.path), hashlib.blake2b(snapshot, digest_size=16).digest())     # Our own compaction is not a change to reload
+
+    def compact_in_background(self) -> None:
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return
+            self.compactor = threading.Thread(target=self.compact, name="SecuroPass compaction")
+            self.compactor.start()
+
+class SqliteBackend():                                                      # sp.db, one row per entry with a unique index on the name, WAL mode so readers never block the writer
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            id          INTEGER PRIMARY KEY,
+            name        TEXT NOT NULL,
+            token       TEXT NOT NULL,
+            created     REAL NOT NULL,
+            modified    REAL NOT NULL,
+            last_used   REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS entries_name ON entries (name);
+        """
+    UPSERT = "INSERT INTO entries (name, token, created, modified) VALUES (?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET token = excluded.token, modified = excluded.modified"
+    REPLACE = "UPDATE entries SET token = ?, modified = ? WHERE name = ? AND token = ?"     # Sets carrying 'expect', a row another process changed meanwhile is left alone
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path if legacy_path is not None else os.path.splitext(path)[0] + '.json'     # Migrated from automatically if it holds entries
+        self.lock = threading.RLock()                                       # One connection shared by the GUI thread and the thread pool
+        self.connection = None
+        self.used = {}                                                      # username -> last-used time, written with the next transaction instead of one each
+        self.data = {}
+        self.version = None                                                 # PRAGMA data_version when data was read, it changes when another connection commits
+
+    def connect(self):
+        if self.connection is None:
+            import sqlite3
+            self.connection = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=FULL")              # A commit is on disk before the change is reported as saved, like the journal's fsync
+            self.connection.executescript(self.SCHEMA)
+        return self.connection
+
+    def load(self) -> None:
+        with span("vault.load"), self.lock:
+            connection = self.connect()
+            self.migrate_json()
+            with span("vault.read"):
+                self.version = connection.execute("PRAGMA data_version").fetchone()[0]
+                self.data = dict(connection.execute("SELECT name, token FROM entries"))
+
+    def refresh(self) -> set:                                               # Rows committed by other processes since the last read, as the set of usernames that changed
+        with self.lock:
+            connection = self.connect()
+            version = connection.execute("PRAGMA data_version").fetchone()[0]
+            if version == self.version:                                     # Nobody else has committed, nothing to read
+                return set()
+            self.version = version
+            with span("vault.read"):
+                data = dict(connection.execute("SELECT name, token FROM entries"))
+            changed = {user for user in self.data.keys() | data.keys() if self.data.get(user) != data.get(user)}
+            self.data = data
+            return changed
+
+    def migrate_json(self) -> int:                                          # One-time import of sp.json and its journal, returns how many entries were copied
+        legacy = JsonBackend(self.legacy_path)
+        snapshot = file_signature(self.legacy_path)
+        if (snapshot is None or snapshot[1] == 0) and file_signature(legacy.journal.path) is None:     # Nothing to migrate, skip taking the lock
+            return 0
+        try:
+            with legacy.file_lock:                                          # Another process migrating at the same time waits, then finds nothing left to do
+                legacy.load(compact=False)                                  # flush() below compacts on this thread
+                if not legacy.data:
+                    return 0
+                legacy.flush()                                              # Fold the journal in first, so the backup below is complete
+                now = time.time()
+                with self.connection:
+                    self.connection.executemany("INSERT INTO entries (name, token, created, modified) VALUES (?, ?, ?, ?) ON CONFLICT (name) DO NOTHING",
+                                                ((user, token, now, now) for user, token in legacy.data.items()))
+                os.replace(self.legacy_path, self.legacy_path + '.bak')     # Only moved aside once the rows are committed, a crash before this just migrates again
+                return len(legacy.data)
+        finally:
+            legacy.close()
+
+    def write(self, records) -> list:                                       # The whole batch in one transaction, consecutive sets and deletes each go in one executemany, returns the records written
+        now = time.time()
+        written = []
+        with span("vault.write"), self.lock:
+            connection = self.connect()
+            with connection:
+                for (op, conditional), group in itertools.groupby(records, key=lambda record: (record.get('op'), 'expect' in record)):
+                    group = list(group)
+                    if op == 'set' and conditional:                         # One statement per row, its rowcount says whether the row still held the expected token
+                        group = [record for record in group if connection.execute(self.REPLACE, (record['token'], now, record['user'], record['expect'])).rowcount]
+                    elif op == 'set':
+                        connection.executemany(self.UPSERT, ((record['user'], record['token'], now, now) for record in group))
+                    elif op == 'del':
+                        connection.executemany("DELETE FROM entries WHERE name = ?", ((record['user'],) for record in group))
+                    written.extend(group)
+                self.write_used(connection)
+            for record in written:
+                if record.get('op') == 'set':
+                    self.data[record['user']] = record['token']
+                elif record.get('op') == 'del':
+                    self.data.pop(record['user'], None)
+        return written
+
+    def write_used(self, connection) -> None:                               # Caller holds the lock and an open transaction
+        if self.used:
+            connection.executemany("UPDATE entries SET last_used = ? WHERE name = ?", ((when, user) for user, when in self.used.items()))
+            self.used.clear()
+
+    def touch(self, user) -> None:
+        with self.lock:
+            self.used[user] = time.time()
+
+    def metadata(self, user):                                               # {"created", "modified", "last_used"} as Unix times, or None if the entry is missing
+        with self.lock:
+            row = self.connect().execute("SELECT created, modified, last_used FROM entries WHERE name = ?", (user,)).fetchone()
+        if row is None:
+            return None
+        created, modified, last_used = row
+        return {"created": created, "modified": modified, "last_used": self.used.get(user, last_used)}
+
+    def watch_paths(self) -> list:                                          # Files another process changes when it commits
+        return [self.path, self.path + '-wal']
+
+    def flush(self) -> None:                                                # Pending last-used times, then the WAL folded back into sp.db
+        with self.lock:
+            connection = self.connect()
+            with connection:
+                self.write_used(connection)
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self.lock:
+            if self.connection is None:
+                return
+            with self.connection:
+                self.write_used(self.connection)
+            self.connection.close()
+            self.connection = None
+
+def open_backend(path):                                                     # Picked by file extension, .db / .sqlite is SQLite, anything else is sp.json
+    if os.path.splitext(path)[1].lower() in SQLITE_SUFFIXES:
+        return SqliteBackend(path)
+    return JsonBackend(path)
+
+class VaultStore():                                                         # Loads the vault once and serves every lookup from an in-memory index of ciphertexts
+    def __init__(self, path=VAULT_PATH, keys=None, autoload=True, backend=None):
+        self.path = path
+        self.keys = keys if keys is not None else MasterKey()               # Vault mode, MasterKey by default or EntryKeys for the original per-entry keyring layout
+        self.backend = backend if backend is not None else open_backend(path)     # Where the ciphertexts are stored, see JsonBackend and SqliteBackend
+        self.cache = SecretCache()                                          # Repeated reveals and copies skip the keyring and Fernet
+        self.rotation_path = os.path.splitext(path)[0] + '.rotate'          # Checkpoint of a key rotation in progress, see securo_rotate.py
+        self.migration_path = os.path.splitext(path)[0] + '.migrate'        # Exists while entries may still be under their per-entry keyring keys
+        if autoload:                                                        # The GUI loads on a worker thread instead
+            self.load()
+
+    @property
+    def data(self):                                                         # username -> Fernet ciphertext, owned by the backend
+        return self.backend.data
+
+    def load(self) -> None:
+        self.backend.load()
+        self.cache.clear()
+
+    def record(self, *records) -> list:                                     # Store a batch of {'op': 'set' | 'del', 'user', 'token'} changes with one write, returns the records written
+        written = self.backend.write(records)                               # A set with an 'expect' token is dropped if the entry no longer holds it
+        for record in written:
+            self.cache.evict(record['user'])                                # Never serve the old password of a changed entry
+        return written
+
+    def refresh(self) -> set:                                               # Picks up changes made by other processes, returns the usernames whose entry changed or disappeared
+        changed = self.backend.refresh()
+        for user in changed:
+            self.cache.evict(user)
+        return changed
+
+    def save(self) -> None:                                                 # Make everything durable in its final form now, e.g. before a backup
+        self.backend.flush()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def lock_vault(self) -> None:                                           # Zero every cached password and forget the master secret
+        self.cache.clear()
+        self.keys.lock()
+
+    def check_rotation(self) -> None:                                       # Another process may have started or finished a key rotation, a stat per unlock
+        if isinstance(self.keys, MasterKey):
+            rotating = os.path.exists(self.rotation_path)
+            if rotating != self.keys.rotating:                              # Read the master secrets again, the next write must use the right one
+                self.keys.rotating = rotating
+                self.keys.lock()
+
+    def unlock(self) -> None:
+        self.check_rotation()
+        created = self.keys.unlock()
+        if not isinstance(self.keys, MasterKey) or not self.data:
+            return
+        if created or os.path.exists(self.migration_path):                  # First unlock in master mode over an existing vault, or a migration that was interrupted
+            self.migrate()
+
+    def migrate(self) -> int:                                               # Move from EntryKeys to MasterKey, returns how many entries were re-encrypted, safe to run again
+        from cryptography.fernet import InvalidToken
+        write_atomic(self.migration_path, b"")                              # Removed only once every old key is gone, the next unlock resumes otherwise
+        legacy = EntryKeys()
+        migrated = []
+        stale = []
+        for user, token in list(self.data.items()):
+            cipher = legacy.fernet(user)
+            if cipher is None:                                              # No per-entry key, either already migrated or unrecoverable
+                continue
+            try:
+                with span("crypto.decrypt"):
+                    password = cipher.decrypt(token.encode())
+            except InvalidToken:                                            # Re-encrypted by an interrupted run before its old key was removed
+                stale.append(user)
+                continue
+            cipher = self.keys.new_fernet(user)
+            with span("crypto.encrypt"):
+                migrated.append((user, cipher.encrypt(password).decode()))
+        if migrated:
+            self.set_tokens(migrated)                                       # One write for the whole vault
+            self.save()
+        for user in [user for user, _ in migrated] + stale:                 # Old keys are only removed once the re-encrypted vault is on disk
+            legacy.forget(user)
+        os.remove(self.migration_path)
+        return len(migrated)
+
+    def users(self) -> list:
+        return list(self.data)
+
+    def get(self, user):
+        return self.data.get(user)
+
+    def metadata(self, user):                                               # Created, modified and last-used times where the backend keeps them, else None
+        return self.backend.metadata(user)
+
+    def __contains__(self, user):
+        return user in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def decrypt(self, user):                                                # Returns the plaintext password, or None if the entry or its key is missing
+        if user not in self.data:
+            return None
+        cached = self.cache.get(user)
+        if cached is not None:
+            self.backend.touch(user)
+            return cached
+        self.unlock()                                                       # Before reading the token, unlocking may migrate it
+        token = self.data.get(user)
+        plaintext = self.decrypt_token(user, token) if token is not None else None
+        if plaintext is None:
+            return None
+        self.cache.put(user, plaintext)
+        self.backend.touch(user)
+        return plaintext.decode()
+
+    def decrypt_token(self, user, token):                                   # Plaintext bytes of one entry's ciphertext, or None, the vault must be unlocked
+        from cryptography.fernet import InvalidToken
+        key_sources = [self.keys]
+        if isinstance(self.keys, MasterKey):                                # An interrupted migration can leave entries under their old per-entry key
+            key_sources.append(EntryKeys())
+        for keys in key_sources:                                            # Only falls through to the keyring lookup if the derived key fails
+            cipher = keys.fernet(user)
+            if cipher is None:
+                continue
+            try:
+                with span("crypto.decrypt"):
+                    plaintext = cipher.decrypt(token.encode())
+            except InvalidToken:
+                continue
+            if keys is not self.keys and not os.path.exists(self.migration_path):     # Missed by a migration, e.g. one cut off before it was recorded, the next unlock finishes it
+                write_atomic(self.migration_path, b"")
+            return plaintext
+        return None
+
+    def iter_decrypted(self):
+        """Yield (username, plaintext bytes) for every entry in one pass.
+
+        Used by audits: the vault is unlocked once, and the secret cache and
+        last-used times are left alone. Entries that cannot be decrypted are
+        skipped. Callers should not keep the plaintexts.
+        """
+        self.unlock()
+        for user, token in list(self.data.items()):
+            plaintext = self.decrypt_token(user, token)
+            if plaintext is not None:
+                yield user, plaintext
+
+    def encrypt_to_json(self, user, password: str) -> None:
+        self.unlock()
+        cipher = self.keys.new_fernet(user)
+        with span("crypto.encrypt"):
+            token = cipher.encrypt(password.encode()).decode()
+        self.record({'op': 'set', 'user': user, 'token': token})
+
+    def set_tokens(self, tokens) -> None:                                   # Commit many already encrypted (user, token) pairs with a single write
+        records = [{'op': 'set', 'user': user, 'token': token} for user, token in tokens]
+        if records:
+            self.record(*records)
+
+    def replace_tokens(self, changes) -> list:                              # Commit (user, old token, new token) changes with a single write, each only if the entry still holds its old token, returns the users written
+        records = [{'op': 'set', 'user': user, 'token': token, 'expect': old} for user, old, token in changes]
+        return [record['user'] for record in self.record(*records)] if records else []
+
+    def delete_password(self, user) -> None:
+        if user not in self.data:                                           # Nothing changed, so the vault is not written
+            return
+        self.record({'op': 'del', 'user': user})
+        self.keys.forget(user)
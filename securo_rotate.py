@@ -0,0 +1,195 @@
+#
+#*
+#**
+#*** This .py file contains the SecuroVault key rotation: every entry is re-encrypted under a fresh master secret.
+#*** The new secret waits in the keyring under ROTATION_KEY_USER while sp.rotate, a checkpoint next to the vault, says a rotation is running.
+#*** Meanwhile every SecuroPass process decrypts with either secret and encrypts with the new one (MultiFernet), so the vault stays usable.
+#*** Entries are re-encrypted on a process pool in name order and committed chunk by chunk, each commit followed by the checkpoint,
+#*** so an interrupted rotation resumes after the last committed chunk. The old secret is only replaced once the whole vault is saved
+#*** and every entry opens with the new secret alone, entries saved under the old one by a process that had not yet seen sp.rotate are rotated too.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from securo_logic import (
+    MASTER_KEY_BYTES,
+    MASTER_KEY_SERVICE,
+    MASTER_KEY_USER,
+    ROTATION_KEY_USER,
+    EntryKeys,
+    MasterKey,
+    VaultError,
+    derive_entry_key,
+    write_atomic,
+    )
+from securo_transfer import chunked, pool_map
+from securo_trace import span
+
+import os
+import json
+import time
+import base64
+import secrets
+
+# --- CONSTANTS ---
+ROTATION_FORMAT         = "securopass-rotation"
+ROTATION_CHUNK_SIZE     = 1024                                          # Entries per worker job, and per commit and checkpoint
+ROTATION_INFLIGHT_CHUNKS = 4                                            # Chunks queued per worker
+
+# --- Checkpoint ---
+
+def read_checkpoint(path):                                              # The checkpoint of an interrupted rotation, or None if no rotation is running
+    try:
+        with open(path, 'r') as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        raise VaultError(f"Sorry, the key rotation checkpoint {path} is damaged.")
+    if checkpoint.get("format") != ROTATION_FORMAT:
+        raise VaultError(f"Sorry, {path} is not a key rotation checkpoint.")
+    return checkpoint
+
+def write_checkpoint(path, checkpoint) -> None:                         # Atomic, so a crash leaves the previous checkpoint intact
+    write_atomic(path, json.dumps(checkpoint).encode())
+
+def start_rotation(store) -> dict:                                      # New secret into the keyring first, then the checkpoint that tells every process to use it
+    import keyring
+    secret = secrets.token_bytes(MASTER_KEY_BYTES)
+    with span("keyring.set"):
+        keyring.set_password(MASTER_KEY_SERVICE, ROTATION_KEY_USER, base64.urlsafe_b64encode(secret).decode())
+    checkpoint = {"format": ROTATION_FORMAT, "started": time.time(), "after": None, "rotated": 0, "legacy": []}
+    write_checkpoint(store.rotation_path, checkpoint)
+    return checkpoint
+
+def finish_rotation(store, checkpoint) -> None:                         # Caller has saved the vault, every entry is already under the new secret
+    import keyring
+    import keyring.errors
+    with span("keyring.set"):
+        keyring.set_password(MASTER_KEY_SERVICE, MASTER_KEY_USER, base64.urlsafe_b64encode(store.keys.secret).decode())     # The old master secret is gone from here on
+    os.remove(store.rotation_path)
+    try:
+        with span("keyring.delete"):
+            keyring.delete_password(MASTER_KEY_SERVICE, ROTATION_KEY_USER)
+    except keyring.errors.PasswordDeleteError:
+        pass
+    legacy = EntryKeys()
+    for user in checkpoint["legacy"]:                                   # Per-entry keys left over from an interrupted migration
+        legacy.forget(user)
+    store.check_rotation()
+
+# --- Worker processes ---
+
+worker_secrets = None                                                   # (new, old) master secrets, set once per worker process
+
+def init_worker(new, old):
+    global worker_secrets
+    worker_secrets = (new, old)
+
+def unrotated_chunk(chunk):                                             # Runs in a worker, returns the (user, token) pairs the new master secret alone cannot open
+    from cryptography.fernet import Fernet, InvalidToken
+    new, _ = worker_secrets
+    unrotated = []
+    for user, token in chunk:
+        try:
+            Fernet(derive_entry_key(new, user)).decrypt(token.encode())
+        except InvalidToken:
+            unrotated.append((user, token))
+    return unrotated
+
+def rotate_chunk(chunk):                                                # Runs in a worker, returns (user, old token, new token or None) for each entry
+    from cryptography.fernet import Fernet, MultiFernet, InvalidToken
+    new, old = worker_secrets
+    rotated = []
+    for user, token in chunk:
+        cipher = MultiFernet([Fernet(derive_entry_key(new, user)), Fernet(derive_entry_key(old, user))])
+        try:
+            rotated.append((user, token, cipher.rotate(token.encode()).decode()))
+        except InvalidToken:                                            # Under neither master secret, left to the main process
+            rotated.append((user, token, None))
+    return rotated
+
+@contextmanager
+def worker_pool(new, old, workers):                                     # Yields map(fn, chunks) run on worker processes that hold both secrets, or in this process for one worker
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(new, old)) as executor:
+            yield lambda fn, chunks: pool_map(executor, fn, chunks, workers * ROTATION_INFLIGHT_CHUNKS)
+    else:
+        init_worker(new, old)
+        yield map
+
+# --- Rotation ---
+
+def commit_chunk(store, chunk, checkpoint, unreadable) -> None:         # Writes one chunk of rotate_chunk results, entries no key opens are added to unreadable
+    changes = []
+    legacy = set()
+    for user, token, rotated in chunk:
+        if rotated is None:
+            plaintext = store.decrypt_token(user, token)                # Falls back to the entry's own keyring key
+            if plaintext is None:
+                unreadable.add(user)
+                continue
+            rotated = store.keys.fernet(user).encrypt(plaintext).decode()
+            legacy.add(user)
+        changes.append((user, token, rotated))
+    written = store.replace_tokens(changes)                             # Compared inside the write, an entry another process changed meanwhile is left for the final check
+    checkpoint["legacy"].extend(user for user in written if user in legacy)
+    checkpoint["rotated"] += len(written)
+
+def rotate_keys(store, workers=None, progress=None) -> dict:
+    """Re-encrypt every entry of store under a new master secret.
+
+    Resumes an interrupted rotation from its checkpoint. Entries still under
+    per-entry keyring keys are moved to the new secret as well, and their keys
+    are removed at the end. progress(rotated, total) is called after every
+    commit. Returns {"rotated", "skipped", "resumed"}, skipped being entries
+    that could not be decrypted with any key and were left as they are.
+    """
+    if not isinstance(store.keys, MasterKey):
+        raise VaultError("Sorry, only vaults using a master key can be rotated.")
+    store.unlock()                                                      # Creates the master secret, or finishes a migration, before anything is rotated
+    checkpoint = read_checkpoint(store.rotation_path)
+    resumed = checkpoint is not None
+    if checkpoint is None:
+        checkpoint = start_rotation(store)
+    store.unlock()                                                      # Sees the checkpoint and loads both secrets
+    if store.keys.previous is None:
+        raise VaultError("Sorry, the new master key of the rotation is missing from the keyring.")
+    store.refresh()                                                     # Entries other processes saved since this store loaded
+
+    new, old = store.keys.secret, store.keys.previous
+    after = checkpoint["after"]
+    pending = [(user, store.get(user)) for user in sorted(store.users()) if after is None or user > after]
+    total = checkpoint["rotated"] + len(pending)
+    unreadable = set()
+    workers = workers or os.cpu_count() or 1
+    with span("rotate.entries"), worker_pool(new, old, workers) as run:
+        for chunk in run(rotate_chunk, chunked(pending, ROTATION_CHUNK_SIZE)):
+            commit_chunk(store, chunk, checkpoint, unreadable)          # Durable before the checkpoint moves past it
+            checkpoint["after"] = chunk[-1][0]
+            write_checkpoint(store.rotation_path, checkpoint)
+            if progress is not None:
+                progress(checkpoint["rotated"], total)
+        while True:                                                     # A process that had not seen the checkpoint yet may have saved entries under the old secret, or changed one mid chunk
+            store.refresh()
+            entries = chunked(sorted(store.data.items()), ROTATION_CHUNK_SIZE)
+            unrotated = [entry for found in run(unrotated_chunk, entries) for entry in found if entry[0] not in unreadable]
+            if not unrotated:
+                break
+            for chunk in run(rotate_chunk, chunked(unrotated, ROTATION_CHUNK_SIZE)):
+                commit_chunk(store, chunk, checkpoint, unreadable)
+    store.save()                                                        # The whole re-encrypted vault on disk in its final form
+    finish_rotation(store, checkpoint)
+    return {"rotated": checkpoint["rotated"], "skipped": len(unreadable), "resumed": resumed}
@@ -0,0 +1,202 @@
+#
+#*
+#**
+#*** This .py file contains the search index behind the SecuroVault search box.
+#*** Entry names are indexed by word prefix (a sorted token list searched with bisect) and by character (for fuzzy matching).
+#*** The index is updated one entry at a time on add and delete, it is never rebuilt while the app is running.
+#*** Results are ranked: exact name, name prefix, word prefix, substring, then fuzzy (subsequence) matches, shorter names first.
+#*** Substring and fuzzy matches are found by regex scans of all folded names joined in that final order, so a search stops as soon as it has enough results.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+import re
+import bisect
+import operator
+import itertools
+
+# --- CONSTANTS ---
+TOKEN_SPLIT             = re.compile(r"[^0-9a-z]+")                     # Words inside a name, e.g. "alice@github.com" -> alice, github, com
+PREFIX_END              = "\U0010ffff"                                  # Sorts after every character, closes a prefix range
+EMPTY                   = frozenset()
+FOLDED                  = operator.itemgetter(1)
+SORT_CANDIDATES_RATIO   = 8                                             # Candidates are sorted and checked one by one below 1/8 of the index, else the whole index is scanned as text
+
+def words(folded):                                                      # Words inside a name other than the whole name itself
+    return {word for word in TOKEN_SPLIT.split(folded) if word and word != folded}
+
+def prefix_range(pairs, query):                                         # Slice of a sorted (key, name) list whose keys start with query
+    lo = bisect.bisect_left(pairs, (query,))
+    hi = bisect.bisect_left(pairs, (query + PREFIX_END,))
+    return pairs[lo:hi]
+
+class SearchIndex():
+    def __init__(self, names=()):
+        self.names = {}                                                 # name -> case folded name
+        self.full = []                                                  # Sorted (folded name, name) pairs, name prefix lookups are a bisect
+        self.words = []                                                 # Sorted (word, name) pairs for the words inside each name
+        self.ranked = []                                                # Sorted (length, folded name, name), the order of the substring and fuzzy tiers
+        self.text = None                                                # The folded names of ranked, one per line, rebuilt on the first search after a change
+        self.line_starts = []
+        self.chars = {}                                                 # character -> names containing it, narrows substring and fuzzy matching
+        self.last_query = None                                          # Every match of the previous query, typing one more letter only re-checks these
+        self.last_matches = None
+        self.add_many(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def rank(self, name):                                               # Shorter names are closer matches, ties are alphabetical so results never depend on set order
+        folded = self.names[name]
+        return len(folded), folded, name
+
+    def index_name(self, name):                                         # Everything except the sorted lists, returns the word pairs to insert
+        folded = name.casefold().replace("\n", " ")                      # One line per name in ranked_text
+        self.names[name] = folded
+        for char in set(folded):
+            self.chars.setdefault(char, set()).add(name)
+        return [(word, name) for word in words(folded)]
+
+    def add(self, name) -> None:
+        if name in self.names:
+            return
+        for pair in self.index_name(name):
+            bisect.insort(self.words, pair)
+        bisect.insort(self.full, (self.names[name], name))
+        bisect.insort(self.ranked, self.rank(name))
+        self.last_query = None
+        self.text = None
+
+    def add_many(self, names) -> None:                                  # One sort for a whole batch, e.g. while the vault is loading
+        full = []
+        pairs = []
+        for name in names:
+            if name not in self.names:
+                pairs.extend(self.index_name(name))
+                full.append((self.names[name], name))
+        if full:
+            self.full.extend(full)                                      # Timsort merges the new run into the sorted list in close to linear time
+            self.full.sort()
+            self.words.extend(pairs)
+            self.words.sort()
+            self.ranked.extend(self.rank(name) for _, name in full)
+            self.ranked.sort()
+            self.last_query = None
+            self.text = None
+
+    def remove(self, name) -> None:
+        folded = self.names.pop(name, None)
+        if folded is None:
+            return
+        for pairs, entry in [(self.full, (folded, name)), (self.ranked, (len(folded), folded, name))] + [(self.words, (word, name)) for word in words(folded)]:
+            i = bisect.bisect_left(pairs, entry)
+            if i < len(pairs) and pairs[i] == entry:
+                del pairs[i]
+        for char in set(folded):
+            self.chars[char].discard(name)
+        self.last_query = None
+        self.text = None
+
+    def candidates(self, query):                                        # Names containing every character of query, or None if too many could, smallest posting set first
+        postings = sorted((self.chars.get(char, EMPTY) for char in set(query)), key=len)
+        if self.last_query is not None and query.startswith(self.last_query):
+            postings.insert(0, self.last_matches)
+        if len(postings[0]) * SORT_CANDIDATES_RATIO >= len(self.ranked):   # Intersecting sets this big costs more than scanning the text
+            return None
+        found = postings[0]
+        for names in postings[1:]:
+            if not found:
+                break
+            found = found & names
+        return found
+
+    def ranked_text(self):                                              # Every folded name in rank order, each line starting after a newline, and the offsets lines start at
+        if self.text is None:
+            lines = list(map(FOLDED, self.ranked))
+            self.text = "\n" + "\n".join(lines) + "\n"
+            self.line_starts = list(itertools.accumulate(map((1).__add__, map(len, lines)), initial=1))
+        return self.text
+
+    def scan_candidates(self, query, pattern, names, found):            # (substring, fuzzy, complete) over a small candidate set, only the matches are sorted into rank order
+        names = list(itertools.filterfalse(found.__contains__, names))
+        folded = list(map(self.names.__getitem__, names))              # map/compress keep the per-name work in C
+        is_substring = list(map(str.__contains__, folded, itertools.repeat(query)))
+        substring = list(itertools.compress(names, is_substring))
+        others = list(itertools.compress(zip(names, folded), map(operator.not_, is_substring)))
+        fuzzy = [name for name, _ in itertools.compress(others, map(pattern.match, (f for _, f in others)))]
+        return sorted(substring, key=self.rank), sorted(fuzzy, key=self.rank), True
+
+    def scan_text(self, query, pattern, found, wanted):                 # Same as scan_candidates over the whole index, both tiers are one regex pass in C that stops early
+        text = self.ranked_text()
+        complete = True
+
+        def matching_lines(regex, exclude, shift=0):                    # Names on lines regex matches, in rank order, at most wanted of them
+            nonlocal complete
+            names = []
+            last = -1
+            for match in regex.finditer(text):
+                line = bisect.bisect_right(self.line_starts, match.start() + shift) - 1
+                if line == last:                                        # Another match on a line already taken
+                    continue
+                last = line
+                name = self.ranked[line][2]
+                if name in found or name in exclude:
+                    continue
+                names.append(name)
+                if wanted is not None and len(names) >= wanted:
+                    complete = False
+                    break
+            return names
+
+        substring = matching_lines(re.compile(re.escape(query)), EMPTY)
+        if wanted is not None and len(substring) >= wanted:             # Fuzzy matches rank below all of these, none of them can make the cut
+            return substring, [], False
+        fuzzy = matching_lines(re.compile("\n" + pattern.pattern), set(substring), shift=1)     # A literal first character lets the regex engine jump from line to line
+        return substring, fuzzy, complete
+
+    def search(self, query, limit=None) -> list:
+        """Names matching query, best first, at most limit of them.
+
+        Tiers come in order: exact and name prefix, word prefix, substring,
+        fuzzy. Prefix tiers are alphabetical straight from the sorted lists,
+        the others shortest first, then alphabetical. Matching stops once
+        limit names are found. An empty query matches nothing, callers show
+        every entry instead.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return []
+        found = dict.fromkeys(name for _, name in prefix_range(self.full, query))     # Ordered set, the exact match sorts first
+        for _, name in prefix_range(self.words, query):
+            found.setdefault(name)
+        if limit is not None and len(found) >= limit:
+            self.last_query = None                                      # Only part of the matches are known, cannot narrow from them
+            return list(found)[:limit]
+        wanted = None if limit is None else limit - len(found)
+        pattern = re.compile("".join(f"[^{char}\n]*{char}" for char in map(re.escape, query)))    # Subsequence match without backtracking, the query letters in order
+        candidates = self.candidates(query)
+        if candidates is not None:
+            substring, fuzzy, complete = self.scan_candidates(query, pattern, candidates, found)
+        else:
+            substring, fuzzy, complete = self.scan_text(query, pattern, found, wanted)
+        found.update(dict.fromkeys(substring))
+        found.update(dict.fromkeys(fuzzy))
+        if complete:                                                    # Every match was seen, so the next, longer query can narrow from them
+            self.last_query = query
+            self.last_matches = set(found)
+        else:
+            self.last_query = None
+        result = list(found)
+        return result if limit is None else result[:limit]
@@ -0,0 +1,114 @@
+#
+#*
+#**
+#*** This .py file contains the timing spans used to profile SecuroPass: keyring calls, vault reads and writes, encryption and the vault list.
+#*** Profiling is off unless SECUROPASS_PROFILE is set (to the trace file to write) or the command line is given --profile.
+#*** While it is off span() hands back one shared do-nothing context manager, so the instrumented code pays a single function call.
+#*** Collected spans are written as Chrome trace-event JSON (open it in chrome://tracing or ui.perfetto.dev) plus a summary per span.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import contextlib
+
+# --- CONSTANTS ---
+PROFILE_ENV             = "SECUROPASS_PROFILE"                          # Set to a file name to profile any run, GUI included
+NULL_SPAN               = contextlib.nullcontext()                      # Returned while profiling is off, reusable and stateless
+
+class Tracer():                                                         # Collects finished spans, appends from any thread
+    def __init__(self):
+        self.events = []                                                # (name, start ns, duration ns, thread id), list.append is atomic
+        self.origin = time.perf_counter_ns()
+        self.thread_names = {}
+
+    def add(self, name, start, duration) -> None:
+        thread = threading.current_thread()
+        self.thread_names.setdefault(thread.ident, thread.name)
+        self.events.append((name, start, duration, thread.ident))
+
+    def trace_events(self) -> dict:                                     # Chrome trace-event format, complete ("X") events in microseconds
+        pid = os.getpid()
+        events = [{"name": name, "cat": name.partition(".")[0], "ph": "X", "ts": (start - self.origin) / 1000, "dur": duration / 1000, "pid": pid, "tid": tid}
+                  for name, start, duration, tid in list(self.events)]
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in self.thread_names.items())
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> dict:                                          # span name -> call count and cumulative, mean and longest time in ms
+        totals = {}
+        for name, _, duration, _ in list(self.events):
+            count, total, longest = totals.get(name, (0, 0, 0))
+            totals[name] = (count + 1, total + duration, max(longest, duration))
+        return {name: {"count": count, "total_ms": round(total / 1e6, 3), "mean_ms": round(total / count / 1e6, 4), "max_ms": round(longest / 1e6, 3)}
+                for name, (count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1])}
+
+    def format_summary(self) -> str:
+        lines = [f"{'span':<24} {'count':>8} {'total ms':>12} {'mean ms':>10} {'max ms':>10}"]
+        for name, row in self.summary().items():
+            lines.append(f"{name:<24} {row['count']:>8} {row['total_ms']:>12.3f} {row['mean_ms']:>10.4f} {row['max_ms']:>10.3f}")
+        return "\n".join(lines)
+
+    def write(self, path) -> None:                                      # Trace to path, summary next to it as <path>.summary.json
+        with open(path, 'w') as f:
+            json.dump(self.trace_events(), f)
+        with open(os.path.splitext(path)[0] + ".summary.json", 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+class Span():
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        if tracer is not None:                                          # Profiling may have been switched off mid span
+            tracer.add(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+tracer = None                                                           # The active Tracer, None while profiling is off
+
+def span(name):
+    """Context manager timing the block as the span name, e.g. "keyring.get".
+
+    The part before the first dot is the trace category. Costs one call and a
+    shared no-op context manager while profiling is off.
+    """
+    if tracer is None:
+        return NULL_SPAN
+    return Span(name)
+
+def enable(path=None) -> Tracer:                                        # Start profiling, with a path the trace and summary are written at exit
+    global tracer
+    if tracer is None:
+        tracer = Tracer()
+        if path:
+            atexit.register(finish, path)
+    return tracer
+
+def finish(path) -> None:
+    if tracer is None:
+        return
+    tracer.write(path)
+    print(tracer.format_summary(), file=sys.stderr)
+    print(f"Trace written to {path}", file=sys.stderr)
+
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV])
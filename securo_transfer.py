@@ -0,0 +1,215 @@
+#
+#*
+#**
+#*** This .py file contains bulk import and export for the SecuroVault.
+#*** Importers read CSV exports (Chrome, Firefox, Bitwarden, LastPass, KeePass...) and JSON exports (Bitwarden, SecuroPass) as a stream of records.
+#*** Records are encrypted in chunks on a process pool and committed to the vault with a single write at the end.
+#*** Encrypted exports are protected with a passphrase (scrypt + Fernet) and can be imported again with the same passphrase.
+#**
+#*
+#
+
+#
+#*
+#** This software uses the MIT License, you are free to use as you wish, an I am not resposbile for any damage caused by this software.
+#** I am not resposible for any security concerns caused by this software, use at your own risk.
+#*
+#
+
+# --- Importing the required modules ---
+
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from securo_logic import (
+    MasterKey,
+    VaultError,
+    derive_entry_key,
+    )
+
+import os
+import csv
+import json
+import base64
+import secrets
+import itertools
+
+# --- CONSTANTS ---
+IMPORT_CHUNK_SIZE       = 512                                           # Records per job sent to a worker process
+IMPORT_INFLIGHT_CHUNKS  = 4                                             # Chunks queued per worker, keeps memory flat on huge files
+EXPORT_FORMAT           = "securopass-export"
+EXPORT_VERSION          = 1
+EXPORT_SCRYPT_N         = 2 ** 15                                       # scrypt cost for the export passphrase
+EXPORT_SCRYPT_R         = 8
+EXPORT_SCRYPT_P         = 1
+EXPORT_SALT_BYTES       = 16
+
+NAME_FIELDS             = ("name", "title")                             # Column names used by common password managers, first match wins
+URL_FIELDS              = ("url", "login_uri", "uri", "website", "origin_url")
+USER_FIELDS             = ("username", "login_username", "login", "user", "email")
+PASSWORD_FIELDS         = ("password", "login_password", "pass")
+
+# --- Readers ---
+
+def first_field(row, fields, strip=True):                               # Passwords are taken as they are, strip=False
+    for field in fields:
+        value = row.get(field)
+        if value:
+            return value.strip() if strip else value
+    return ""
+
+def entry_name(name, url, user):                                        # Vault key for an imported login, e.g. "alice@github.com"
+    site = name or urlsplit(url).hostname or url
+    if site and user:
+        return f"{user}@{site}"
+    return site or user
+
+def normalise(row):                                                     # Maps one record from any supported format to (vault key, password), or None
+    row = {str(key).strip().lower(): value for key, value in row.items() if isinstance(value, str)}
+    password = first_field(row, PASSWORD_FIELDS, strip=False)           # Byte for byte, spaces included, or it would no longer match the account
+    user = entry_name(first_field(row, NAME_FIELDS), first_field(row, URL_FIELDS), first_field(row, USER_FIELDS))
+    if not user or not password:
+        return None
+    return user, password
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:             # utf-8-sig drops the BOM some exporters write
+        for row in csv.DictReader(f):
+            yield row
+
+def read_json(path, passphrase=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and data.get("format") == EXPORT_FORMAT:  # Our own encrypted export
+        if passphrase is None:
+            raise VaultError("This export is encrypted, a passphrase is needed to import it.")
+        data = decrypt_export(data, passphrase)
+    if isinstance(data, dict) and isinstance(data.get("items"), list):   # Bitwarden, logins are nested under "login"
+        for item in data["items"]:
+            login = item.get("login") or {}
+            uris = login.get("uris") or [{}]
+            yield {"name": item.get("name"), "username": login.get("username"), "password": login.get("password"), "url": uris[0].get("uri")}
+    elif isinstance(data, dict):                                        # SecuroPass plain export, {username: password}
+        for user, password in data.items():
+            yield {"name": user, "password": password}
+    elif isinstance(data, list):                                        # Generic list of login objects
+        for item in data:
+            if isinstance(item, dict):
+                yield item
+    else:
+        raise VaultError("Sorry, this JSON file is not a supported export.")
+
+def read_records(path, file_format="auto", passphrase=None):
+    if file_format == "auto":
+        file_format = "csv" if path.lower().endswith(".csv") else "json"
+    rows = read_csv(path) if file_format == "csv" else read_json(path, passphrase)
+    for row in rows:
+        entry = normalise(row)
+        if entry is not None:
+            yield entry
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# --- Worker processes ---
+
+worker_secret = None                                                    # Master secret of the vault, set once per worker process
+
+def init_worker(secret):
+    global worker_secret
+    worker_secret = secret
+
+def encrypt_chunk(chunk):                                               # Runs in a worker, returns (user, token) pairs for VaultStore.set_tokens
+    from cryptography.fernet import Fernet
+    return [(user, Fernet(derive_entry_key(worker_secret, user)).encrypt(password.encode()).decode()) for user, password in chunk]
+
+def pool_map(executor, fn, chunks, inflight):                           # Like Executor.map, but only keeps a few chunks queued instead of reading the whole input
+    pending = []
+    for chunk in chunks:
+        pending.append(executor.submit(fn, chunk))
+        if len(pending) >= inflight:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+# --- Import ---
+
+def import_entries(store, records, workers=None, progress=None):
+    """Encrypt a stream of (user, password) records into store with one write at the end.
+
+    Entries whose name is already in the vault, or repeated within records, are
+    skipped. progress(imported, skipped) is called after every chunk. Returns
+    (imported, skipped).
+    """
+    store.unlock()
+    seen = set()
+    skipped = 0
+
+    def fresh():                                                        # Generator stage that drops duplicates before anything is encrypted
+        nonlocal skipped
+        for user, password in records:
+            if user in store or user in seen:
+                skipped += 1
+                continue
+            seen.add(user)
+            yield user, password
+
+    chunks = chunked(fresh(), IMPORT_CHUNK_SIZE)
+    tokens = []
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and isinstance(store.keys, MasterKey):
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(store.keys.secret,)) as executor:
+            for encrypted in pool_map(executor, encrypt_chunk, chunks, workers * IMPORT_INFLIGHT_CHUNKS):
+                tokens.extend(encrypted)
+                if progress is not None:
+                    progress(len(tokens), skipped)
+    else:                                                               # Single worker, or per-entry keys that need the keyring on this process
+        for chunk in chunks:
+            tokens.extend((user, store.keys.new_fernet(user).encrypt(password.encode()).decode()) for user, password in chunk)
+            if progress is not None:
+                progress(len(tokens), skipped)
+    store.set_tokens(tokens)                                            # The only write to the vault
+    return len(tokens), skipped
+
+def import_file(store, path, file_format="auto", passphrase=None, workers=None, progress=None):
+    return import_entries(store, read_records(path, file_format, passphrase), workers, progress)
+
+# --- Encrypted export ---
+
+def export_key(passphrase, salt, n=EXPORT_SCRYPT_N, r=EXPORT_SCRYPT_R, p=EXPORT_SCRYPT_P) -> bytes:
+    from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+    return base64.urlsafe_b64encode(Scrypt(salt=salt, length=32, n=n, r=r, p=p).derive(passphrase.encode()))
+
+def encrypt_export(entries, passphrase) -> dict:                        # entries is {username: password}
+    from cryptography.fernet import Fernet
+    salt = secrets.token_bytes(EXPORT_SALT_BYTES)
+    token = Fernet(export_key(passphrase, salt)).encrypt(json.dumps(entries).encode())
+    return {
+        "format":   EXPORT_FORMAT,
+        "version":  EXPORT_VERSION,
+        "kdf":      {"name": "scrypt", "salt": base64.b64encode(salt).decode(), "n": EXPORT_SCRYPT_N, "r": EXPORT_SCRYPT_R, "p": EXPORT_SCRYPT_P},
+        "data":     token.decode(),
+        }
+
+def decrypt_export(export, passphrase) -> dict:
+    from cryptography.fernet import Fernet, InvalidToken
+    kdf = export["kdf"]
+    key = export_key(passphrase, base64.b64decode(kdf["salt"]), kdf["n"], kdf["r"], kdf["p"])
+    try:
+        return json.loads(Fernet(key).decrypt(export["data"].encode()))
+    except InvalidToken:
+        raise VaultError("Sorry, the passphrase is wrong or the export is damaged.")
+
+def export_entries(store):                                              # Every entry decrypted, {username: password}, entries that cannot be decrypted are left out
+    return {user: plaintext.decode() for user, plaintext in store.iter_decrypted()}     # One pass that leaves the secret cache and last-used times alone
+
+def write_export(path, entries, passphrase=None) -> None:               # Plain JSON, or encrypted if a passphrase is given, readable by the owner only
+    content = encrypt_export(entries, passphrase) if passphrase else entries
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(content, f, indent=2)
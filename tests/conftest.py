@@ -0,0 +1,23 @@
+#
+#*
+#** Shared fixtures for the SecuroPass tests: an in-memory keyring (securo_bench.MemoryKeyring) so no test touches the real OS keyring.
+#** Run from the repository root with: python -m pytest -q
+#*
+#
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keyring
+import pytest
+
+from securo_bench import MemoryKeyring
+
+@pytest.fixture
+def memory_keyring():
+    backend = MemoryKeyring()
+    keyring.set_keyring(backend)
+    yield backend
+    keyring.set_keyring(MemoryKeyring())                                    # Never fall back to the real keyring between tests
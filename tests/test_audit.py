@@ -0,0 +1,67 @@
+#
+#*
+#** Vault health audit: reuse and near-duplicate groups, weak passwords, undecryptable entries and the breach section, on a small seeded vault.
+#*
+#
+
+import hashlib
+
+import pytest
+
+import securo_audit
+import securo_breach
+from securo_logic import VaultStore
+
+PASSWORDS = {
+    "alice@github": "Summer2023!",
+    "alice@gitlab": "summer2024",                                           # One year and a symbol away from the one above
+    "bob@bank": "Xk9#mQ2$vL7!pR4w",
+    "bob@broker": "Xk9#mQ2$vL7!pR4w",                                       # Reused, not a near-duplicate
+    "carol@forum": "cat",
+    "dave@mail": "Tr0ub4dor&3xyzQW",
+    "erin@shop": "P@ssw0rd1",
+    "erin@store": "password",                                               # Same once leetspeak and the digit are dropped
+    }
+
+@pytest.fixture
+def store(tmp_path, memory_keyring):
+    store = VaultStore(str(tmp_path / "sp.db"))
+    for user, password in PASSWORDS.items():
+        store.encrypt_to_json(user, password)
+    store.record({'op': 'set', 'user': "frank@old", 'token': "not a fernet token"})     # Its key is gone
+    yield store
+    store.close()
+
+def report_without_timing(report):
+    report = dict(report)
+    del report["seconds"]
+    report["reused"] = sorted(map(sorted, report["reused"]))
+    report["near_duplicates"] = sorted(map(sorted, report["near_duplicates"]))
+    return report
+
+def test_report(store):
+    report = securo_audit.audit_vault(store)
+    assert report_without_timing(report) == {
+        "checked": 8,
+        "undecryptable": 1,
+        "reused": [["bob@bank", "bob@broker"]],
+        "near_duplicates": [["alice@github", "alice@gitlab"], ["erin@shop", "erin@store"]],
+        "weak": [                                                           # length * log2(pool), weakest first
+            {"user": "carol@forum", "entropy_bits": 14.1, "length": 3, "classes": ["lowercase"]},
+            {"user": "erin@store", "entropy_bits": 37.6, "length": 8, "classes": ["lowercase"]},
+            {"user": "alice@gitlab", "entropy_bits": 51.7, "length": 10, "classes": ["lowercase", "numbers"]},
+            {"user": "erin@shop", "entropy_bits": 59.0, "length": 9, "classes": ["lowercase", "uppercase", "symbols", "numbers"]},
+            ],
+        "breached": None,                                                   # No index given, not an empty list
+        }
+    text = securo_audit.format_report(report)
+    assert "1 could not be decrypted" in text
+    assert "Breached" not in text
+
+def test_breached_section(store, tmp_path):
+    corpus = tmp_path / "pwned.txt"
+    corpus.write_text("".join(f"{hashlib.sha1(password.encode()).hexdigest().upper()}:{seen}\n" for password, seen in [("cat", 5), ("password", 9000), ("unused", 1)]))
+    securo_breach.build_index(str(corpus), str(tmp_path / "pwned.idx"))
+    with securo_breach.BreachIndex(str(tmp_path / "pwned.idx")) as index:
+        report = securo_audit.audit_vault(store, index)
+    assert report["breached"] == [{"user": "erin@store", "times_seen": 9000}, {"user": "carol@forum", "times_seen": 5}]
@@ -0,0 +1,62 @@
+#
+#*
+#** Breached password index: a tiny HIBP style corpus built into an index, then generating passwords against it.
+#*
+#
+
+import string
+import hashlib
+
+import pytest
+
+import securo_breach
+from securo_logic import Preferences, SecuroPass, VaultError
+
+def corpus(tmp_path, passwords):
+    path = tmp_path / "pwned.txt"
+    path.write_text("".join(f"{hashlib.sha1(p.encode()).hexdigest().upper()}:{n}\n" for n, p in enumerate(passwords, 1)))
+    return str(path)
+
+@pytest.fixture
+def lowercase_index(tmp_path):                                              # Every one letter lower case password is breached
+    index_path = str(tmp_path / "pwned.idx")
+    securo_breach.build_index(corpus(tmp_path, string.ascii_lowercase), index_path)
+    with securo_breach.BreachIndex(index_path) as index:
+        yield index
+
+def lowercase_pref(length, phrase=None):
+    pref = Preferences()
+    pref.uppercase = pref.symbols = pref.numbers = False
+    pref.length = length
+    pref.phrase = phrase
+    return pref
+
+def test_generate_gives_up_when_every_password_is_breached(lowercase_index):
+    securo_pass = SecuroPass(lowercase_pref(1))
+    securo_pass.breach = lowercase_index
+    with pytest.raises(VaultError):
+        securo_pass.generate_password()
+
+def test_phrase_filling_the_length_is_not_redrawn(lowercase_index):
+    securo_pass = SecuroPass(lowercase_pref(1, phrase="q"))
+    securo_pass.breach = lowercase_index
+    assert securo_pass.generate_password() == "q"
+
+def test_without_breached_redraws_until_clean(lowercase_index):
+    draws = iter(["a", "b", "ab"])
+    assert list(securo_breach.without_breached(["z"], lowercase_index, lambda: next(draws))) == ["ab"]
+    with pytest.raises(VaultError):
+        list(securo_breach.without_breached(["z"], lowercase_index, lambda: "y", max_redraws=3))
+
+def test_merge_in_passes_keeps_every_record(tmp_path, monkeypatch):     # 27 runs of 2 records merged 4 at a time, with repeated hashes to combine
+    monkeypatch.setattr(securo_breach, "SORT_RUN_RECORDS", 2)
+    monkeypatch.setattr(securo_breach, "MERGE_FAN_IN", 4)
+    index_path = str(tmp_path / "pwned.idx")
+    assert securo_breach.build_index(corpus(tmp_path, list(string.ascii_lowercase) + ["a", "b"]), index_path) == 26
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["pwned.idx", "pwned.idx.bloom", "pwned.txt"]
+    with securo_breach.BreachIndex(index_path) as index:
+        assert index.bloom is not None
+        assert index.times_seen("a") == 1 + 27
+        assert index.times_seen("z") == 26
+        assert all(letter in index for letter in string.ascii_lowercase)
+        assert "ab" not in index
@@ -0,0 +1,104 @@
+#
+#*
+#** SecretCache: TTL expiry, the LRU bound, zeroed buffers on every eviction path and the counters, driven by a fake clock.
+#*
+#
+
+import pytest
+
+from securo_logic import SecretCache, VaultStore
+
+class Clock():
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+def buffer_of(cache, user):                                                 # The bytearray itself, to check it is zeroed once evicted
+    return cache.entries[user][0]
+
+def wiped(buffer):                                                          # Zeroed in place, same length
+    return len(buffer) > 0 and not any(buffer)
+
+def test_hit_miss_and_expiry(clock):
+    cache = SecretCache(max_entries=4, ttl=60, clock=clock)
+    assert cache.get("alice") is None
+    cache.put("alice", b"hunter2")
+    buffer = buffer_of(cache, "alice")
+    clock.now += 59
+    assert cache.get("alice") == "hunter2"
+    clock.now += 1                                                          # Expires exactly at the TTL
+    assert cache.get("alice") is None
+    assert wiped(buffer)
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 1, "size": 0}
+
+def test_least_recently_used_entry_goes_first(clock):
+    cache = SecretCache(max_entries=2, ttl=60, clock=clock)
+    cache.put("alice", b"one")
+    cache.put("bob", b"two")
+    alice, bob = buffer_of(cache, "alice"), buffer_of(cache, "bob")
+    assert cache.get("alice") == "one"                                      # bob is now the least recently used
+    cache.put("carol", b"three")
+    assert list(cache.entries) == ["alice", "carol"]
+    assert wiped(bob) and not wiped(alice)
+    assert cache.stats()["evictions"] == 1
+
+def test_replacing_an_entry_wipes_the_old_buffer(clock):
+    cache = SecretCache(max_entries=2, ttl=60, clock=clock)
+    cache.put("alice", b"old")
+    old = buffer_of(cache, "alice")
+    cache.put("alice", b"new")
+    assert wiped(old)
+    assert cache.get("alice") == "new"
+
+def test_evict_sweep_and_clear_wipe_buffers(clock):
+    cache = SecretCache(max_entries=8, ttl=60, clock=clock)
+    for user in ["alice", "bob", "carol", "dave"]:
+        cache.put(user, user.encode())
+        clock.now += 10
+    buffers = {user: buffer_of(cache, user) for user in cache.entries}
+    cache.evict("alice")
+    cache.evict("nobody")                                                   # Not cached, nothing happens
+    assert wiped(buffers["alice"])
+    clock.now = 1000.0 + 75                                                 # bob expired at 1070, carol at 1080
+    cache.sweep()
+    assert list(cache.entries) == ["carol", "dave"]
+    assert wiped(buffers["bob"]) and not wiped(buffers["carol"])
+    cache.clear()
+    assert len(cache) == 0
+    assert all(map(wiped, buffers.values()))
+    assert cache.stats()["evictions"] == 4
+
+def test_zero_size_cache_keeps_nothing(clock):
+    cache = SecretCache(max_entries=0, ttl=60, clock=clock)
+    cache.put("alice", b"hunter2")
+    assert cache.get("alice") is None
+
+def test_vault_changes_and_locking_evict(tmp_path, memory_keyring):
+    path = str(tmp_path / "sp.db")
+    store = VaultStore(path)
+    store.encrypt_to_json("alice", "one")
+    store.encrypt_to_json("bob", "two")
+    assert store.decrypt("alice") == "one" and store.decrypt("bob") == "two"
+    alice = buffer_of(store.cache, "alice")
+    store.encrypt_to_json("alice", "changed")                               # record() evicts the entry it writes
+    assert "alice" not in store.cache.entries and wiped(alice)
+    assert store.decrypt("alice") == "changed"
+
+    other = VaultStore(path)                                                # Another process changes bob
+    other.encrypt_to_json("bob", "elsewhere")
+    other.close()
+    bob = buffer_of(store.cache, "bob")
+    assert store.refresh() == {"bob"}
+    assert wiped(bob)
+    assert store.decrypt("bob") == "elsewhere"
+
+    buffers = [buffer_of(store.cache, user) for user in ["alice", "bob"]]
+    store.lock_vault()
+    assert len(store.cache) == 0 and all(map(wiped, buffers))
+    store.close()
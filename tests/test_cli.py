@@ -0,0 +1,27 @@
+#
+#*
+#** Command line runs against a temporary vault with the in-memory keyring.
+#*
+#
+
+import sqlite3
+
+import securo_cli
+
+def test_get_records_last_used(tmp_path, memory_keyring, capsys):
+    vault = str(tmp_path / "sp.db")
+    assert securo_cli.main(["--vault", vault, "add", "bob", "-p", "hunter2"]) == 0
+    assert securo_cli.main(["--vault", vault, "get", "bob"]) == 0
+    assert capsys.readouterr().out.strip().endswith("hunter2")
+    with sqlite3.connect(vault) as connection:
+        last_used, = connection.execute("SELECT last_used FROM entries WHERE name = 'bob'").fetchone()
+    assert last_used is not None
+
+def test_json_vault_is_readable_after_each_command(tmp_path, memory_keyring, capsys):
+    vault = str(tmp_path / "sp.json")
+    for i in range(5):
+        assert securo_cli.main(["--vault", vault, "add", f"user{i}", "-p", f"pw{i}"]) == 0
+    assert securo_cli.main(["--vault", vault, "rm", "user2"]) == 0
+    capsys.readouterr()
+    assert securo_cli.main(["--vault", vault, "ls"]) == 0
+    assert capsys.readouterr().out.split() == ["user0", "user1", "user3", "user4"]
@@ -0,0 +1,73 @@
+#
+#*
+#** Batched password generation: alphabets, require_each, phrase handling as the original generate_password did it, and chunked streaming.
+#*
+#
+
+import string
+import itertools
+
+import pytest
+
+import securo_logic
+from securo_logic import Charset, generate_many, iter_passwords
+
+CLASSES = {Charset.UPPERCASE: string.ascii_uppercase, Charset.SYMBOLS: string.punctuation, Charset.NUMBERS: string.digits}
+
+def allowed(flags):
+    return set(string.ascii_lowercase).union(*(chars for flag, chars in CLASSES.items() if flags & flag))
+
+def original_shape(phrase, length):                                         # The original generate_password: (phrase + '_' + random)[:length]
+    return ((phrase + '_' if phrase else '') + "?" * length)[:length]
+
+@pytest.mark.parametrize("flags", [Charset(value) for value in range(8)])
+def test_only_enabled_characters(flags):
+    passwords = generate_many(500, 16, flags)
+    assert len(passwords) == 500 and all(len(password) == 16 for password in passwords)
+    used = set("".join(passwords))
+    assert used <= allowed(flags)
+    assert used == allowed(flags)                                           # 8000 draws cover every character of at most 94
+
+@pytest.mark.parametrize("flags", [Charset.ALL, Charset.UPPERCASE | Charset.NUMBERS, Charset.LOWERCASE])
+def test_require_each_includes_every_class(flags):
+    classes = [string.ascii_lowercase] + [chars for flag, chars in CLASSES.items() if flags & flag]
+    for password in generate_many(2000, len(classes), flags, require_each=True):     # As short as possible, most raw draws miss a class
+        assert all(set(password) & set(chars) for chars in classes)
+
+def test_too_short_for_every_class():
+    with pytest.raises(ValueError):
+        generate_many(1, 3, Charset.ALL, require_each=True)
+    with pytest.raises(ValueError):
+        generate_many(1, 5, Charset.ALL, phrase="abc", require_each=True)  # "abc_" leaves one character for upper case and numbers
+    assert len(generate_many(1, 6, Charset.ALL, phrase="abc", require_each=True)[0]) == 6     # The phrase already brings lower case and a symbol
+    with pytest.raises(ValueError):
+        generate_many(1, 0)
+
+@pytest.mark.parametrize("phrase, length", [("hello", 12), ("hello", 6), ("hello", 5), ("hello", 3), (None, 8), ("", 8)])
+def test_phrase_matches_original_rules(phrase, length):
+    for password in generate_many(20, length, Charset.ALL, phrase):
+        shape = original_shape(phrase, length)
+        fixed = len(shape.rstrip("?"))
+        assert len(password) == length
+        assert password[:fixed] == shape[:fixed]
+        assert set(password[fixed:]) <= allowed(Charset.ALL)
+
+def test_streams_in_chunks(monkeypatch):
+    draws = []
+    draw = securo_logic.Alphabet.draw
+
+    def counted(self, count):
+        draws.append(count)
+        return draw(self, count)
+    monkeypatch.setattr(securo_logic.Alphabet, "draw", counted)
+    passwords = iter_passwords(50, 10, Charset.ALL, chunk_size=7)
+    first = list(itertools.islice(passwords, 7))
+    assert draws == [7 * 10]                                                # Nothing is drawn past the first chunk until it is needed
+    rest = list(passwords)
+    assert len(first) + len(rest) == 50 and len(set(first + rest)) == 50
+    assert draws == [7 * 10] * 7 + [1 * 10]
+
+    draws.clear()                                                           # Rejected passwords are made up in later, smaller rounds
+    passwords = list(iter_passwords(50, 10, Charset.ALL, require_each=True, chunk_size=7))
+    assert len(passwords) == 50
+    assert all(count <= 7 * 10 for count in draws)
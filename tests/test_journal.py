@@ -0,0 +1,103 @@
+#
+#*
+#** sp.json snapshot plus sp.log journal: torn-tail recovery, compaction, and several writers on one vault.
+#*
+#
+
+import os
+import threading
+
+import securo_logic
+from securo_logic import Journal, JsonBackend
+
+def record(user, token):
+    return {'op': 'set', 'user': user, 'token': token}
+
+def test_torn_tail_is_cut_off_and_later_writes_survive(tmp_path):
+    path = str(tmp_path / "sp.json")
+    backend = JsonBackend(path)
+    backend.load()
+    backend.write([record("alice", "a1"), record("bob", "b1")])
+    backend.close()
+    with open(backend.journal.path, 'ab') as f:                             # A crash half way through an append
+        f.write(Journal.encode(record("carol", "c1"))[:-7])
+
+    reopened = JsonBackend(path)
+    reopened.load()
+    assert reopened.data == {"alice": "a1", "bob": "b1"}
+    reopened.write([record("dave", "d1")])                                 # Must not land behind the garbage
+    reopened.close()
+
+    again = JsonBackend(path)
+    again.load()
+    assert again.data == {"alice": "a1", "bob": "b1", "dave": "d1"}
+    again.close()
+
+def test_corrupt_record_stops_replay(tmp_path):
+    path = str(tmp_path / "sp.json")
+    journal = Journal(os.path.splitext(path)[0] + '.log')
+    journal.append(record("alice", "a1"))
+    line = bytearray(Journal.encode(record("bob", "b1")))
+    line[-3] ^= 1                                                           # Checksum no longer matches
+    with open(journal.path, 'ab') as f:
+        f.write(bytes(line))
+    records, offset = journal.read()
+    assert records == [record("alice", "a1")]
+    assert offset == journal.size()
+
+def test_compaction_folds_journal_into_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(securo_logic, "JOURNAL_COMPACT_THRESHOLD", 4)
+    path = str(tmp_path / "sp.json")
+    backend = JsonBackend(path)
+    backend.load()
+    for i in range(20):
+        backend.write([record("alice", f"a{i}")])
+    backend.flush()
+    backend.close()
+    assert not os.path.exists(backend.journal.path)
+    reopened = JsonBackend(path)
+    reopened.load()
+    assert reopened.data == {"alice": "a19"}
+    reopened.close()
+
+def test_compaction_keeps_records_of_concurrent_writers(tmp_path, monkeypatch):
+    monkeypatch.setattr(securo_logic, "JOURNAL_COMPACT_THRESHOLD", 8)     # Compactions run all the time while both write
+    path = str(tmp_path / "sp.json")
+    writers = [JsonBackend(path) for _ in range(3)]                         # Separate lock file handles, like separate processes
+    for writer in writers:
+        writer.load()
+
+    def write_many(writer, name):
+        for i in range(150):
+            writer.write([record(f"{name}-{i}", f"t{i}")])
+            if i % 3 == 0:
+                writer.write([record(f"{name}-{i}", f"u{i}")])             # Overwrites make dead records, which trigger compaction
+
+    threads = [threading.Thread(target=write_many, args=(writer, f"w{n}")) for n, writer in enumerate(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for writer in writers:
+        writer.close()
+
+    fresh = JsonBackend(path)
+    fresh.load()
+    assert len(fresh.data) == 450
+    assert fresh.data["w1-3"] == "u3" and fresh.data["w2-4"] == "t4"
+    fresh.close()
+
+def test_refresh_reports_changes_from_another_writer(tmp_path):
+    path = str(tmp_path / "sp.json")
+    ours, theirs = JsonBackend(path), JsonBackend(path)
+    ours.load()
+    theirs.load()
+    theirs.write([record("alice", "a1")])
+    assert ours.refresh() == {"alice"}
+    assert ours.data == {"alice": "a1"}
+    theirs.flush()                                                          # Snapshot swapped in underneath
+    theirs.write([{'op': 'del', 'user': "alice"}])
+    assert ours.refresh() == {"alice"}
+    assert ours.data == {}
+    ours.close()
+    theirs.close()
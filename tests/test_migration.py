@@ -0,0 +1,91 @@
+#
+#*
+#** Moving a vault from per-entry keyring keys (EntryKeys) to the master key, including runs that were cut off.
+#*
+#
+
+import os
+import threading
+
+import pytest
+
+import securo_logic
+from securo_logic import EntryKeys, VaultStore, KEYRING_SERVICE, MASTER_KEY_SERVICE, MASTER_KEY_USER
+
+USERS = [f"user{i}" for i in range(20)]
+
+def legacy_vault(path):
+    store = VaultStore(path, keys=EntryKeys())
+    for user in USERS:
+        store.encrypt_to_json(user, f"password-{user}")
+    store.close()
+
+def entry_keys(keyring_backend):
+    return [user for service, user in keyring_backend.secrets if service == KEYRING_SERVICE]
+
+def test_first_unlock_migrates_everything(tmp_path, memory_keyring):
+    path = str(tmp_path / "sp.db")
+    legacy_vault(path)
+    store = VaultStore(path)
+    assert store.decrypt("user3") == "password-user3"
+    assert entry_keys(memory_keyring) == []
+    assert not os.path.exists(store.migration_path)
+    store.close()
+
+def test_interrupted_migration_resumes(tmp_path, memory_keyring, monkeypatch):
+    path = str(tmp_path / "sp.db")
+    legacy_vault(path)
+
+    def cut_off(self, user):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(EntryKeys, "forget", cut_off)                       # Vault re-encrypted and saved, old keys not yet removed
+    store = VaultStore(path)
+    with pytest.raises(KeyboardInterrupt):
+        store.unlock()
+    store.close()
+    monkeypatch.undo()
+    assert os.path.exists(store.migration_path)
+
+    store = VaultStore(path)
+    store.unlock()
+    assert entry_keys(memory_keyring) == []                                 # Keys of entries already re-encrypted are removed too
+    assert not os.path.exists(store.migration_path)
+    before = memory_keyring.calls
+    store.lock_vault()
+    assert [store.decrypt(user) for user in USERS] == [f"password-{user}" for user in USERS]
+    assert memory_keyring.calls - before == 1                               # Back to one keyring call for the whole vault
+    store.close()
+
+def test_migration_cut_off_before_it_was_recorded(tmp_path, memory_keyring):
+    path = str(tmp_path / "sp.db")
+    legacy_vault(path)
+    securo_logic.MasterKey().unlock()                                       # Master secret stored, then the process died
+    assert (MASTER_KEY_SERVICE, MASTER_KEY_USER) in memory_keyring.secrets
+
+    store = VaultStore(path)
+    assert store.decrypt("user0") == "password-user0"                       # Opens with its old key and notes the missed migration
+    assert os.path.exists(store.migration_path)
+    store.close()
+
+    store = VaultStore(path)
+    store.unlock()
+    assert entry_keys(memory_keyring) == []
+    assert store.decrypt("user19") == "password-user19"
+    store.close()
+
+def test_json_vault_with_a_long_journal_moves_to_sqlite(tmp_path, monkeypatch):
+    legacy = securo_logic.JsonBackend(str(tmp_path / "sp.json"))            # Left by a killed process, 200 overwrites never compacted
+    monkeypatch.setattr(securo_logic, "JOURNAL_COMPACT_THRESHOLD", 10 ** 6)
+    for i in range(200):
+        legacy.write([{'op': 'set', 'user': "alice", 'token': f"token{i}"}])
+    legacy.close()
+    monkeypatch.undo()
+
+    opened = []
+    opener = threading.Thread(target=lambda: opened.append(VaultStore(str(tmp_path / "sp.db"))), daemon=True)
+    opener.start()
+    opener.join(timeout=10)
+    assert not opener.is_alive(), "opening the vault deadlocked"
+    assert opened[0].data == {"alice": "token199"}
+    assert os.path.exists(str(tmp_path / "sp.json.bak"))
+    opened[0].close()
@@ -0,0 +1,138 @@
+#
+#*
+#** Master key rotation: a full run, a run cut off between chunks, entries changed by another process meanwhile, and entries still under per-entry keys.
+#*
+#
+
+import os
+
+import pytest
+
+import securo_rotate
+from securo_logic import EntryKeys, VaultStore, KEYRING_SERVICE, MASTER_KEY_SERVICE, MASTER_KEY_USER, ROTATION_KEY_USER
+
+USERS = [f"user{i:02}" for i in range(20)]
+
+@pytest.fixture(params=["sp.db", "sp.json"])
+def vault(request, tmp_path, memory_keyring):
+    path = str(tmp_path / request.param)
+    store = VaultStore(path)
+    for user in USERS:
+        store.encrypt_to_json(user, f"password-{user}")
+    store.close()
+    return path
+
+def passwords(path):                                                        # Read back by a fresh store, as another process would
+    store = VaultStore(path)
+    try:
+        return {user: store.decrypt(user) for user in store.users()}
+    finally:
+        store.close()
+
+def expected(**changed):
+    return {user: changed.get(user, f"password-{user}") for user in USERS}
+
+def assert_finished(path, memory_keyring, old_secret):
+    assert not os.path.exists(os.path.splitext(path)[0] + ".rotate")
+    assert (MASTER_KEY_SERVICE, ROTATION_KEY_USER) not in memory_keyring.secrets
+    assert memory_keyring.secrets[(MASTER_KEY_SERVICE, MASTER_KEY_USER)] != old_secret
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_rotation_re_encrypts_every_entry(vault, memory_keyring, workers):
+    old_secret = memory_keyring.secrets[(MASTER_KEY_SERVICE, MASTER_KEY_USER)]
+    store = VaultStore(vault)
+    tokens = dict(store.data)
+    assert securo_rotate.rotate_keys(store, workers=workers) == {"rotated": 20, "skipped": 0, "resumed": False}
+    assert all(store.get(user) != tokens[user] for user in USERS)
+    store.close()
+    assert_finished(vault, memory_keyring, old_secret)
+    assert passwords(vault) == expected()
+
+def test_interrupted_rotation_resumes_from_checkpoint(vault, memory_keyring, monkeypatch):
+    old_secret = memory_keyring.secrets[(MASTER_KEY_SERVICE, MASTER_KEY_USER)]
+    monkeypatch.setattr(securo_rotate, "ROTATION_CHUNK_SIZE", 4)
+    write_checkpoint = securo_rotate.write_checkpoint
+    writes = []
+
+    def cut_off(path, checkpoint):                                          # The start, then two chunks, then the process dies
+        writes.append(checkpoint["after"])
+        if len(writes) > 3:
+            raise KeyboardInterrupt
+        write_checkpoint(path, checkpoint)
+    monkeypatch.setattr(securo_rotate, "write_checkpoint", cut_off)
+    store = VaultStore(vault)
+    with pytest.raises(KeyboardInterrupt):
+        securo_rotate.rotate_keys(store, workers=1)
+    store.close()
+    monkeypatch.setattr(securo_rotate, "write_checkpoint", write_checkpoint)
+    assert securo_rotate.read_checkpoint(store.rotation_path)["after"] == "user07"
+    assert passwords(vault) == expected()                                   # Usable mid rotation, half the entries under each secret
+
+    store = VaultStore(vault)
+    assert securo_rotate.rotate_keys(store, workers=1) == {"rotated": 20, "skipped": 0, "resumed": True}
+    store.close()
+    assert_finished(vault, memory_keyring, old_secret)
+    assert passwords(vault) == expected()
+
+def test_entry_changed_during_rotation_is_kept(vault, memory_keyring, monkeypatch):
+    rotate_chunk = securo_rotate.rotate_chunk
+
+    def change_meanwhile(chunk):                                            # Another process saves a new password after the worker read the old one
+        rotated = rotate_chunk(chunk)
+        if chunk[0][0] == USERS[0]:
+            other = VaultStore(vault)
+            other.encrypt_to_json("user05", "changed")
+            other.delete_password("user06")
+            other.close()
+        return rotated
+    monkeypatch.setattr(securo_rotate, "rotate_chunk", change_meanwhile)
+    store = VaultStore(vault)
+    result = securo_rotate.rotate_keys(store, workers=1)
+    assert result["rotated"] == 18
+    assert store.decrypt("user05") == "changed"
+    assert "user06" not in store
+    store.close()
+    changed = expected(user05="changed")
+    del changed["user06"]
+    assert passwords(vault) == changed
+
+def test_entries_under_per_entry_keys_are_rotated(vault, memory_keyring):
+    legacy = VaultStore(vault, keys=EntryKeys())                            # Left behind by a migration that missed it
+    legacy.encrypt_to_json("user03", "legacy")
+    legacy.close()
+    store = VaultStore(vault)
+    assert securo_rotate.rotate_keys(store, workers=1)["rotated"] == 20
+    store.close()
+    assert (KEYRING_SERVICE, "user03") not in memory_keyring.secrets
+    assert passwords(vault) == expected(user03="legacy")
+
+def test_entries_saved_under_the_old_secret_are_rotated(vault, memory_keyring, monkeypatch):
+    old_secret = memory_keyring.secrets[(MASTER_KEY_SERVICE, MASTER_KEY_USER)]
+    store = VaultStore(vault)
+    store.unlock()
+    other = VaultStore(vault)                                               # Another window, unlocked before the rotation started
+    other.encrypt_to_json("early", "early")                                 # Saved after the rotating store loaded
+    old_ciphers = {user: other.keys.new_fernet(user) for user in ["late", "later"]}
+
+    def save_under_old_secret(user):                                        # Encrypted just before sp.rotate appeared, written just after
+        other.record({'op': 'set', 'user': user, 'token': old_ciphers[user].encrypt(user.encode()).decode()})
+    start_rotation = securo_rotate.start_rotation
+    rotate_chunk = securo_rotate.rotate_chunk
+
+    def start_then_save(store):
+        checkpoint = start_rotation(store)
+        save_under_old_secret("late")
+        return checkpoint
+
+    def rotate_then_save(chunk):                                            # After the entries to rotate were listed
+        rotated = rotate_chunk(chunk)
+        if "later" not in other:
+            save_under_old_secret("later")
+        return rotated
+    monkeypatch.setattr(securo_rotate, "start_rotation", start_then_save)
+    monkeypatch.setattr(securo_rotate, "rotate_chunk", rotate_then_save)
+    assert securo_rotate.rotate_keys(store, workers=1) == {"rotated": 23, "skipped": 0, "resumed": False}
+    store.close()
+    other.close()
+    assert_finished(vault, memory_keyring, old_secret)
+    assert passwords(vault) == dict(expected(), early="early", late="late", later="later")
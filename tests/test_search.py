@@ -0,0 +1,54 @@
+#
+#*
+#** Search box ranking: results must match a brute-force ranking, and must not depend on typing history or set order.
+#*
+#
+
+import random
+import re
+
+import pytest
+
+from securo_search import SearchIndex
+
+def reference(names, query, limit):                                     # Straightforward version of the documented ranking
+    query = query.casefold()
+    folded = {name: name.casefold() for name in names}
+    prefix = sorted((f, name) for name, f in folded.items() if f.startswith(query))
+    word = sorted((w, name) for name, f in folded.items() for w in set(re.split(r"[^0-9a-z]+", f)) if w and w != f and w.startswith(query))
+    found = dict.fromkeys(name for _, name in prefix)
+    for _, name in word:
+        found.setdefault(name)
+    rank = lambda name: (len(folded[name]), folded[name], name)
+    rest = sorted((name for name in names if name not in found), key=rank)
+    pattern = re.compile(".*?".join(map(re.escape, query)), re.DOTALL)
+    found.update(dict.fromkeys(name for name in rest if query in folded[name]))
+    found.update(dict.fromkeys(name for name in rest if query not in folded[name] and pattern.search(folded[name])))
+    return list(found)[:limit]
+
+@pytest.fixture(scope="module")
+def names():
+    rng = random.Random(7)
+    sites = ["github", "google", "outlook", "yahoo", "reddit", "paypal", "Dropbox"]
+    return [f"{rng.choice(['alice', 'Bob', 'oscar', 'olivia'])}{i}@{rng.choice(sites)}{i % 13}.{rng.choice(['com', 'org', 'co.uk'])}" for i in range(3000)]
+
+@pytest.mark.parametrize("query", ["a", "ab", "o.c", "oc", "git", "alice1", "bob2@", "zz", "yh", "DROP"])
+@pytest.mark.parametrize("limit", [None, 50])
+def test_matches_reference_ranking(names, query, limit):
+    assert SearchIndex(names).search(query, limit) == reference(names, query, limit)
+
+def test_narrowing_gives_the_same_results_as_a_fresh_search(names):
+    index = SearchIndex(names)
+    for typed in ["o", "ol", "oli", "oliv"]:
+        narrowed = index.search(typed, 100)
+        assert narrowed == SearchIndex(names).search(typed, 100)
+
+def test_updates_are_searchable(names):
+    index = SearchIndex(names)
+    index.search("zq", 10)
+    index.add("zq-new@example.com")
+    assert index.search("zq", 10) == ["zq-new@example.com"]
+    index.remove("zq-new@example.com")
+    index.remove(names[0])
+    assert index.search("zq", 10) == []
+    assert names[0] not in index.search(names[0], None)
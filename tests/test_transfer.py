@@ -0,0 +1,43 @@
+#
+#*
+#** Bulk import and export: passwords must round-trip unchanged, and exporting must not look like using every entry.
+#*
+#
+
+import json
+
+import pytest
+
+import securo_transfer
+from securo_logic import VaultStore
+
+CSV = 'name,url,username,password\ngithub,https://github.com,alice,correct horse battery staple\nwork,,bob, padded \n'
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_keeps_passwords_byte_for_byte(tmp_path, memory_keyring, workers):
+    source = tmp_path / "chrome.csv"
+    source.write_text(CSV)
+    store = VaultStore(str(tmp_path / "sp.db"))
+    assert securo_transfer.import_file(store, str(source), workers=workers) == (2, 0)
+    assert store.decrypt("alice@github") == "correct horse battery staple"
+    assert store.decrypt("bob@work") == " padded "
+    store.close()
+
+def test_export_round_trip_leaves_cache_and_last_used_alone(tmp_path, memory_keyring):
+    store = VaultStore(str(tmp_path / "sp.db"))
+    store.encrypt_to_json("alice", "pass phrase one")
+    store.encrypt_to_json("bob", "two")
+    entries = securo_transfer.export_entries(store)
+    assert entries == {"alice": "pass phrase one", "bob": "two"}
+    assert len(store.cache) == 0
+    store.save()
+    assert store.metadata("alice")["last_used"] is None
+
+    output = tmp_path / "backup.json"
+    securo_transfer.write_export(str(output), entries, "hunter2")
+    assert json.loads(output.read_text())["format"] == securo_transfer.EXPORT_FORMAT
+    other = VaultStore(str(tmp_path / "other.db"))
+    securo_transfer.import_file(other, str(output), passphrase="hunter2", workers=1)
+    assert other.decrypt("alice") == "pass phrase one"
+    other.close()
+    store.close()